@@ -0,0 +1,1120 @@
+"""Замеры производительности операций журнала термообработки.
+
+Запуск:
+    python benchmarks.py save [--rows 1000 10000 100000]
+    python benchmarks.py scan [--rows 100000]
+    python benchmarks.py tail [--rows 10000 100000]
+    python benchmarks.py fields [--heats 5000]
+    python benchmarks.py search [--heats 5000 100000]
+    python benchmarks.py import [--rows 100000]
+    python benchmarks.py report [--rows 1000000]
+    python benchmarks.py schedule [--intervals 1000000]
+    python benchmarks.py log [--calls 100000]
+    python benchmarks.py concurrent [--processes 8] [--saves 10] [--storage excel sqlite] [--no-lock]
+    python benchmarks.py archive [--years 5] [--rows-per-year 20000]
+    python benchmarks.py generate [--rows 1000 10000 100000 1000000] [--data bench_data]
+    python benchmarks.py suite [--rows 1000 10000 100000] [--save-baseline] [--tolerance 1.5]
+    python benchmarks.py startup [--heats 5000] [--max-first-paint 1.0] [--max-ready 5.0]
+
+Замеры с формой выполняются без экрана (QT_QPA_PLATFORM=offscreen).
+Журнал замеров termoobrabotka.log при этом не пишется (TERMO_LOG=''),
+синтетические плавки - 2025 года (TERMO_YEAR=2025).
+"""
+import argparse
+import contextlib
+import csv
+import datetime
+import io
+import json
+import multiprocessing
+import platform
+import random
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from openpyxl import Workbook, load_workbook
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('TERMO_LOG', '')
+os.environ.setdefault('TERMO_YEAR', '2025')
+
+import termoobrabotka
+
+
+def создать_журнал(file_name, количество_строк):
+    """Генерирует termoobrabotka.xlsx с заданным числом строк в Records."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Records")
+    ws.append(termoobrabotka.ЗАГОЛОВКИ)
+    for i in range(количество_строк):
+        ws.append([f"{i % 12 + 1}-{i}/24", i % 2 + 1, "01.10.2024",
+                   "23:30", "07:40", "11:00", "14:10"])
+    wb.save(file_name)
+
+
+def создать_плавки(file_name, количество_строк):
+    """Генерирует plavka.xlsx: номер плавки во втором столбце."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Плавки")
+    ws.append(['Дата', 'Номер плавки', 'Марка', 'Масса'])
+    for i in range(количество_строк):
+        ws.append(["01.02.2025", f"{i % 12 + 1}-{i}/25", "20Л", 1250])
+    wb.save(file_name)
+
+
+def замерить(функция, *args):
+    """Время вызова и пик памяти Python-аллокаций.
+
+    Память меряется отдельным прогоном: tracemalloc заметно замедляет код.
+    """
+    начало = time.perf_counter()
+    функция(*args)
+    время = time.perf_counter() - начало
+    tracemalloc.start()
+    функция(*args)
+    _, пик = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return время, пик
+
+
+def _полное_чтение(file_name, столбец, лист=None):
+    """Прежний способ: полная загрузка книги в режиме чтения-записи."""
+    workbook = load_workbook(file_name)
+    sheet = workbook[лист] if лист else workbook.active
+    return [row[столбец] for row in sheet.iter_rows(min_row=2, values_only=True)]
+
+
+def записи_загрузки(количество_плавок):
+    return [
+        (f"1-{i}/25", '1', '13.02.2025', '08:00', '12:00', '', '')
+        for i in range(количество_плавок)
+    ]
+
+
+def bench_save(строки, количество_плавок=10):
+    print(f"{'строк в журнале':>16} {'по одной, с':>12} {'пакетом, с':>11} {'ускорение':>10}")
+    каталог = tempfile.mkdtemp()
+    try:
+        эталон = os.path.join(каталог, 'etalon.xlsx')
+        журнал = os.path.join(каталог, 'termoobrabotka.xlsx')
+        записи = записи_загрузки(количество_плавок)
+        for количество_строк in строки:
+            создать_журнал(эталон, количество_строк)
+
+            shutil.copy(эталон, журнал)
+            начало = time.perf_counter()
+            for запись in записи:
+                termoobrabotka.save_records_to_excel([запись], журнал)
+            по_одной = time.perf_counter() - начало
+
+            shutil.copy(эталон, журнал)
+            начало = time.perf_counter()
+            termoobrabotka.save_records_to_excel(записи, журнал)
+            пакетом = time.perf_counter() - начало
+
+            print(f"{количество_строк:>16} {по_одной:>12.3f} {пакетом:>11.3f} {по_одной / пакетом:>9.1f}x")
+    finally:
+        shutil.rmtree(каталог)
+
+
+def bench_scan(строки):
+    print(f"{'строк':>8} {'функция':<20} {'режим':<10} {'время, с':>9} {'пик, МБ':>9}")
+    каталог = tempfile.mkdtemp()
+    try:
+        плавки = os.path.join(каталог, 'plavka.xlsx')
+        журнал = os.path.join(каталог, 'termoobrabotka.xlsx')
+        for количество_строк in строки:
+            создать_плавки(плавки, количество_строк)
+            создать_журнал(журнал, количество_строк)
+            замеры = [
+                ('get_existing_plavki', 'полный', _полное_чтение, (плавки, 1)),
+                ('get_existing_plavki', 'потоковый', termoobrabotka.get_existing_plavki, (плавки,)),
+                ('get_used_plavki', 'полный', _полное_чтение, (журнал, 0, "Records")),
+                ('get_used_plavki', 'потоковый', termoobrabotka.get_used_plavki, (журнал,)),
+            ]
+            for имя, режим, функция, args in замеры:
+                время, пик = замерить(функция, *args)
+                print(f"{количество_строк:>8} {имя:<20} {режим:<10} {время:>9.3f} {пик / 2**20:>9.1f}")
+    finally:
+        shutil.rmtree(каталог)
+
+
+def bench_tail(строки, количество_плавок=10):
+    print(f"{'строк':>8} {'полный проход, с':>17} {'с водяного знака, с':>20} {'без изменений, с':>17}")
+    каталог = tempfile.mkdtemp()
+    try:
+        журнал = os.path.join(каталог, 'termoobrabotka.xlsx')
+        for количество_строк in строки:
+            создать_журнал(журнал, количество_строк)
+            termoobrabotka.scan_used_plavki(журнал)
+            termoobrabotka.save_records_to_excel(записи_загрузки(количество_плавок), журнал)
+
+            начало = time.perf_counter()
+            полный = termoobrabotka.get_used_plavki(журнал)
+            время_полного = time.perf_counter() - начало
+
+            начало = time.perf_counter()
+            хвост = termoobrabotka.scan_used_plavki(журнал)
+            время_хвоста = time.perf_counter() - начало
+
+            начало = time.perf_counter()
+            без_изменений = termoobrabotka.scan_used_plavki(журнал)
+            время_без_изменений = time.perf_counter() - начало
+
+            assert полный == хвост == без_изменений
+            print(f"{количество_строк:>8} {время_полного:>17.3f} {время_хвоста:>20.3f} {время_без_изменений:>17.3f}")
+            os.remove(termoobrabotka.файл_состояния_сканирования(журнал))
+    finally:
+        shutil.rmtree(каталог)
+
+
+def rss():
+    """Текущий размер резидентной памяти процесса в байтах (только Linux)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return 0
+
+
+def _старые_поля(window, плавки, количество_полей=10):
+    """Прежний update_plavka_fields: удалить и создать поля заново."""
+    from PySide6.QtWidgets import QComboBox
+
+    for field in window.старые_поля:
+        window.plавка_layout.removeWidget(field)
+        field.deleteLater()
+    window.старые_поля = []
+    for i in range(количество_полей):
+        combo = QComboBox()
+        combo.addItem(f"ПЛАВКА {i+1}")
+        combo.addItems(плавки)
+        window.старые_поля.append(combo)
+        window.plавка_layout.addWidget(combo)
+
+
+def bench_fields(количество_плавок, повторов=10):
+    from PySide6.QtCore import QCoreApplication, QEvent
+    from PySide6.QtWidgets import QApplication
+    import termoobrabotka_gui
+
+    app = QApplication.instance() or QApplication([])
+    плавки = [f"{i % 12 + 1}-{i}/25" for i in range(количество_плавок)]
+    индекс = termoobrabotka.HeatIndex(плавки)
+    termoobrabotka_gui.get_heat_index = lambda проверить=True: индекс
+
+    window = termoobrabotka_gui.MainWindow()
+    window.show()
+    # Плавки загружаются после первой отрисовки
+    app.processEvents()
+    window.пул.waitForDone()
+    app.processEvents()
+    window.старые_поля = []
+
+    def замер(функция):
+        до = rss()
+        начало = time.perf_counter()
+        for _ in range(повторов):
+            функция()
+            # Дать deleteLater удалить старые виджеты
+            QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        return (time.perf_counter() - начало) / повторов, rss() - до
+
+    время_старое, память_старая = замер(lambda: _старые_поля(window, плавки))
+    _старые_поля(window, [], 0)
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    время_новое, память_новая = замер(lambda: window.on_plavki_loaded(индекс))
+
+    print(f"плавок: {количество_плавок}, полей: {termoobrabotka.МАКС_ПОЛЕЙ_ПЛАВОК}")
+    print(f"{'способ':<24} {'обновление, мс':>15} {'прирост RSS, МБ':>16}")
+    print(f"{'новые QComboBox':<24} {время_старое * 1000:>15.1f} {память_старая / 2**20:>16.1f}")
+    print(f"{'общая модель + фильтры':<24} {время_новое * 1000:>15.1f} {память_новая / 2**20:>16.1f}")
+
+    начало = time.perf_counter()
+    window.plавка_fields[0].setCurrentIndex(1)
+    print(f"выбор плавки (перефильтрация остальных полей): {(time.perf_counter() - начало) * 1000:.1f} мс")
+
+    начало = time.perf_counter()
+    window.термообработка_номер_печи.setCurrentText('2')
+    window.термообработка_номер_печи.setCurrentText('1')
+    print(f"смена печи туда и обратно: {(time.perf_counter() - начало) * 1000:.1f} мс")
+    window.close()
+
+
+def bench_search(количества, повторов=1000):
+    префиксы = ['1', '10-', '10-1', '10-12', '10-125', '7-9', '12-99']
+    print(f"{'плавок':>8} {'построение, мс':>15} {'bisect, мкс':>12} {'перебор, мкс':>13}")
+    for количество_плавок in количества:
+        плавки = [f"{i % 12 + 1}-{i}/25" for i in range(количество_плавок)]
+
+        начало = time.perf_counter()
+        индекс = termoobrabotka.HeatIndex(плавки)
+        построение = time.perf_counter() - начало
+
+        начало = time.perf_counter()
+        for _ in range(повторов):
+            for префикс in префиксы:
+                индекс.найти(префикс, лимит=termoobrabotka.МАКС_ПОДСКАЗОК)
+        поиск = (time.perf_counter() - начало) / повторов / len(префиксы)
+
+        по_убыванию = индекс.по_убыванию
+        начало = time.perf_counter()
+        for _ in range(повторов // 100 or 1):
+            for префикс in префиксы:
+                [п for п in по_убыванию if п.startswith(префикс)][:termoobrabotka.МАКС_ПОДСКАЗОК]
+        перебор = (time.perf_counter() - начало) / (повторов // 100 or 1) / len(префиксы)
+
+        print(f"{количество_плавок:>8} {построение * 1000:>15.1f} {поиск * 1e6:>12.1f} {перебор * 1e6:>13.1f}")
+
+
+def bench_import(строки, хранилища=('excel', 'sqlite')):
+    print(f"{'хранилище':<10} {'строк CSV':>10} {'проверка, с':>12} {'проверка и запись, с':>21}")
+    каталог = tempfile.mkdtemp()
+    рабочий_каталог = os.getcwd()
+    хранилище_по_умолчанию = os.environ.get('TERMO_STORAGE')
+    try:
+        os.chdir(каталог)
+        for хранилище in хранилища:
+            os.environ['TERMO_STORAGE'] = хранилище
+            for количество_строк in строки:
+                создать_плавки(termoobrabotka.ФАЙЛ_ПЛАВОК, количество_строк)
+                создать_журнал(termoobrabotka.ФАЙЛ_ЖУРНАЛА, 1000)
+                with open('loads.csv', 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f, delimiter=';')
+                    writer.writerow(termoobrabotka.ЗАГОЛОВКИ)
+                    for i in range(количество_строк):
+                        writer.writerow([f"{i % 12 + 1}-{i}/25", i % 2 + 1, "13.02.2025",
+                                         "22:41", "07:22", "08:03", "11:56"])
+
+                termoobrabotka._хранилище = None
+                было_записей = len(list(termoobrabotka.get_storage().records()))
+                termoobrabotka._хранилище = None
+                начало = time.perf_counter()
+                принято, _ = termoobrabotka.import_records_from_csv('loads.csv', io.StringIO(), dry_run=True)
+                проверка = time.perf_counter() - начало
+
+                termoobrabotka._хранилище = None
+                начало = time.perf_counter()
+                termoobrabotka.import_records_from_csv('loads.csv', io.StringIO())
+                с_записью = time.perf_counter() - начало
+
+                assert принято == количество_строк
+                assert len(list(termoobrabotka.get_storage().records())) == было_записей + количество_строк
+                print(f"{хранилище:<10} {количество_строк:>10} {проверка:>12.2f} {с_записью:>21.2f}")
+                termoobrabotka._хранилище = None
+                for file_name in os.listdir('.'):
+                    os.remove(file_name)
+    finally:
+        if хранилище_по_умолчанию is None:
+            os.environ.pop('TERMO_STORAGE', None)
+        else:
+            os.environ['TERMO_STORAGE'] = хранилище_по_умолчанию
+        os.chdir(рабочий_каталог)
+        shutil.rmtree(каталог)
+
+
+def записи_журнала(количество_строк, seed=1):
+    """Записи журнала в виде формы: загрузки по 9-10 плавок, два цикла."""
+    генератор = random.Random(seed)
+    записи = []
+    день = datetime.date(2020, 1, 1)
+    печь = 1
+    while len(записи) < количество_строк:
+        начало = генератор.randrange(24 * 60)
+        длительность = генератор.randrange(180, 600)
+        конец = (начало + длительность) % (24 * 60)
+        начало2 = (конец + генератор.randrange(30, 240)) % (24 * 60)
+        конец2 = (начало2 + генератор.randrange(60, 300)) % (24 * 60)
+        время = [f"{м // 60:02d}:{м % 60:02d}" for м in (начало, конец, начало2, конец2)]
+        if генератор.random() < 0.3:
+            время[2:] = ['', '']
+        for i in range(10 if печь == 1 else 9):
+            записи.append((f"{len(записи)}/25", str(печь), день.strftime('%d.%m.%Y'), *время))
+        печь = 3 - печь
+        if печь == 1:
+            день += datetime.timedelta(days=1)
+    return записи[:количество_строк]
+
+
+def _отчет_циклом(records):
+    """Та же сводка, что journal_report, но построчным циклом Python."""
+    циклы = set()
+    for _, печь, дата, *время in records:
+        день = (datetime.datetime.strptime(дата, '%d.%m.%Y').date() - datetime.date(1970, 1, 1)).days
+        минуты = [int(в[:2]) * 60 + int(в[3:]) if в else None for в in время]
+        старт = день * 1440 + минуты[0]
+        длительность = (минуты[1] - минуты[0]) % 1440
+        циклы.add((int(печь), старт, длительность))
+        if минуты[2] is not None:
+            финиш = старт + длительность
+            циклы.add((int(печь), финиш + (минуты[2] - минуты[1]) % 1440, (минуты[3] - минуты[2]) % 1440))
+    циклы = sorted(циклы)
+    строки = []
+    for период, дней in (('сутки', 1), ('неделя', 7)):
+        начало_периода = (lambda д: д) if дней == 1 else (lambda д: д - (д + 3) % 7)
+        группы = {}
+
+        def группа(печь, день):
+            return группы.setdefault((печь, начало_периода(день)), [0, 0, 0, 0, 0, 0])
+
+        for i, (печь, старт, длительность) in enumerate(циклы):
+            день = старт // 1440
+            финиш = старт + длительность
+            до_полуночи = min(финиш, (день + 1) * 1440) - старт
+            г = группа(печь, день)
+            г[0] += 1
+            г[1] += длительность
+            г[2] += до_полуночи
+            if длительность > до_полуночи:
+                группа(печь, день + 1)[2] += длительность - до_полуночи
+            if i + 1 < len(циклы) and циклы[i + 1][0] == печь:
+                перерыв = max(циклы[i + 1][1] - финиш, 0)
+                г = группа(печь, финиш // 1440)
+                г[3] += 1
+                г[4] += перерыв
+                г[5] = max(г[5], перерыв)
+        for (печь, начало), (циклов, сумма, в_работе, перерывов, сумма_перерывов, макс) in sorted(группы.items()):
+            строки.append((
+                период, печь, (datetime.date(1970, 1, 1) + datetime.timedelta(days=начало)).isoformat(),
+                циклов, в_работе, round(сумма / циклов, 1) if циклов else 0.0,
+                дней * 1440 - в_работе, перерывов,
+                round(сумма_перерывов / перерывов, 1) if перерывов else 0.0,
+                макс, round(в_работе / (дней * 1440) * 100, 1)
+            ))
+    return строки
+
+
+def _проверить_отчет():
+    """Даты далеко от 1970 года и повторы загрузки сводятся так же, как циклом."""
+    записи = [
+        ('1/25', '3', '09.05.2079', '08:00', '10:00', '', ''),
+        ('2/25', '1', '01.03.1925', '08:00', '10:00', '', ''),
+        ('3/25', '1', '01.03.1925', '08:00', '10:00', '', ''),
+        ('4/25', '1', '31.12.3100', '23:00', '01:00', '02:00', '03:00'),
+        ('5/25', '2', '01.01.0001', '00:00', '23:59', '', ''),
+        ('6/25', '2', '31.12.9999', '12:00', '12:30', '', ''),
+    ]
+    отчет = termoobrabotka.journal_report(записи)
+    assert отчет == _отчет_циклом(записи), отчет
+    assert ('сутки', 1, '1925-03-01') in [строка[:3] for строка in отчет]
+    assert ('сутки', 1, '3101-01-01') in [строка[:3] for строка in отчет]
+
+
+def bench_report(строки):
+    _проверить_отчет()
+    print(f"{'записей':>9} {'в массивы, с':>13} {'сводка numpy, с':>16} {'цикл Python, с':>15}")
+    for количество_строк in строки:
+        записи = записи_журнала(количество_строк)
+
+        начало = time.perf_counter()
+        массивы = termoobrabotka.journal_arrays(записи)
+        загрузка = time.perf_counter() - начало
+
+        начало = time.perf_counter()
+        отчет = termoobrabotka.journal_summary(массивы)
+        векторно = time.perf_counter() - начало
+
+        начало = time.perf_counter()
+        эталон = _отчет_циклом(записи)
+        циклом = time.perf_counter() - начало
+
+        assert отчет == эталон
+        print(f"{количество_строк:>9} {загрузка:>13.3f} {векторно:>16.3f} {циклом:>15.3f}")
+
+
+def интервалы_печей(количество, seed=1):
+    """Циклы двух печей подряд с перерывами; часть переходит через полночь."""
+    генератор = random.Random(seed)
+    циклы = []
+    начало = {'1': 0, '2': 0}
+    начало_дня = datetime.date(2000, 1, 1).toordinal() * termoobrabotka.МИНУТ_В_СУТКАХ
+    for i in range(количество):
+        печь = '1' if i % 2 == 0 else '2'
+        длительность = генератор.randrange(60, 600)
+        циклы.append((печь, начало_дня + начало[печь], длительность))
+        начало[печь] += длительность + генератор.randrange(0, 240)
+    return циклы
+
+
+def _проверить_график():
+    """Переход через полночь и проверка перед записью в обоих хранилищах."""
+    validate_cycles = termoobrabotka.validate_cycles
+    assert validate_cycles('23:30', '07:40', '11:00', '14:10') is None
+    assert validate_cycles('08:00', '08:00') is not None
+    assert validate_cycles('08:00', '12:00', '10:00', '11:00') is not None
+
+    загрузка = ('1-1/25', '2', '18.10.2026', '23:30', '07:40', '11:00', '14:10')
+    индекс = termoobrabotka.CycleIndex.из_записей([загрузка])
+    ожидается = {
+        ('19.10.2026', '06:00', '08:00'): 1,   # внутри первого цикла после полуночи
+        ('19.10.2026', '07:40', '11:00'): 0,   # ровно между циклами
+        ('18.10.2026', '22:00', '23:31'): 1,
+        ('18.10.2026', '20:00', '02:00'): 1,   # новый цикл тоже через полночь
+        ('19.10.2026', '14:10', '20:00'): 0,
+        ('18.10.2026', '23:30', '07:40'): 0,   # та же загрузка - другие плавки
+    }
+    for (дата, начало, конец), пересечений in ожидается.items():
+        for цикл in termoobrabotka.циклы_записи(('2-1/25', '2', дата, начало, конец)):
+            assert len(индекс.пересечения(*цикл)) == пересечений, (дата, начало, конец)
+            assert not индекс.пересечения('1', *цикл[1:])
+
+    рабочий_каталог = os.getcwd()
+    with tempfile.TemporaryDirectory() as каталог:
+        os.chdir(каталог)
+        try:
+            for хранилище in (termoobrabotka.ExcelStorage(), termoobrabotka.SQLiteStorage()):
+                termoobrabotka._хранилище = хранилище
+                termoobrabotka.save_records([загрузка])
+                try:
+                    termoobrabotka.save_records([('2-1/25', '2', '19.10.2026', '06:00', '08:00')])
+                except Exception as e:
+                    assert 'печь 2, 18.10.2026 23:30 - 19.10.2026 07:40' in str(e), e
+                else:
+                    raise AssertionError("пересечение не найдено")
+                termoobrabotka.save_records([('3-1/25', '1', '19.10.2026', '06:00', '08:00')])
+                termoobrabotka.save_records([('4-1/25', '2', '19.10.2026', '14:10', '20:00')])
+                assert len(list(хранилище.records())) == 3
+        finally:
+            termoobrabotka._хранилище = None
+            os.chdir(рабочий_каталог)
+
+
+def bench_schedule(количества, запросов=10000, сверок=300):
+    import numpy as np
+
+    _проверить_график()
+    print(f"{'интервалов':>10} {'построение, с':>14} {'память, МБ':>11} "
+          f"{'проверка, мкс':>14} {'полный перебор, мкс':>20}")
+    for количество in количества:
+        циклы = интервалы_печей(количество)
+        начало = time.perf_counter()
+        индекс = termoobrabotka.CycleIndex(циклы)
+        построение = time.perf_counter() - начало
+        tracemalloc.start()
+        termoobrabotka.CycleIndex(циклы)
+        память = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        генератор = random.Random(2)
+        первый, последний = циклы[0][1], циклы[-1][1]
+        запросы = [('1' if генератор.random() < 0.5 else '2',
+                    генератор.randrange(первый, последний), генератор.randrange(60, 600))
+                   for _ in range(запросов)]
+        начало = time.perf_counter()
+        for запрос in запросы:
+            индекс.пересечения(*запрос)
+        проверка = (time.perf_counter() - начало) / запросов
+
+        # Сверка с полным перебором
+        печи = np.array([печь for печь, _, _ in циклы])
+        старты = np.array([старт for _, старт, _ in циклы])
+        финиши = старты + np.array([длительность for _, _, длительность in циклы])
+        начало = time.perf_counter()
+        for печь, старт, длительность in запросы[:сверок]:
+            маска = (печи == печь) & (старты < старт + длительность) & (финиши > старт)
+            маска &= ~((старты == старт) & (финиши == старт + длительность))
+            ожидается = sorted(zip(старты[маска].tolist(), финиши[маска].tolist()))
+            найдено = sorted((н, н + д) for _, н, д in индекс.пересечения(печь, старт, длительность))
+            assert найдено == ожидается
+        перебор = (time.perf_counter() - начало) / сверок
+
+        индекс.добавить([('1', последний + 10 ** 6, 100)])
+        assert индекс.пересечения('1', последний + 10 ** 6 + 50, 10)
+        print(f"{количество:>10} {построение:>14.2f} {память / 2**20:>11.1f} "
+              f"{проверка * 1e6:>14.1f} {перебор * 1e6:>20.1f}")
+
+
+def bench_log(вызовов):
+    """Цена замера: пустой блок без журнала и с записью строки в файл."""
+    прежний = os.environ.get('TERMO_LOG')
+    with tempfile.TemporaryDirectory() as каталог:
+        лог = os.path.join(каталог, 'termoobrabotka.log')
+        print(f"{'журнал':<10} {'на замер, мкс':>14}")
+        for название, значение in (('выключен', ''), ('включен', лог)):
+            os.environ['TERMO_LOG'] = значение
+            начало = time.perf_counter()
+            for _ in range(вызовов):
+                with termoobrabotka.замер('bench', rows=1):
+                    pass
+            print(f"{название:<10} {(time.perf_counter() - начало) / вызовов * 1e6:>14.1f}")
+        сводка = termoobrabotka.log_summary(лог)
+        assert сводка[0][:2] == ('bench', вызовов)
+        termoobrabotka._лог.close()
+        termoobrabotka._лог = None
+    if прежний is None:
+        del os.environ['TERMO_LOG']
+    else:
+        os.environ['TERMO_LOG'] = прежний
+
+
+def _станция(номер, сохранений, каталог, хранилище, без_блокировки, старт):
+    """Один процесс-станция: сохраняет свои загрузки и пробует общую плавку."""
+    os.chdir(каталог)
+    os.environ['TERMO_STORAGE'] = хранилище
+    if без_блокировки:
+        termoobrabotka.блокировка_файла = lambda *args, **kwargs: contextlib.nullcontext()
+    старт.wait()
+    ошибки = []
+    for i in range(сохранений):
+        # У каждой загрузки свой день: циклы станций не пересекаются
+        день = datetime.date(2025, 1, 1) + datetime.timedelta(days=номер * сохранений + i)
+        try:
+            termoobrabotka.save_records([
+                (f"{номер}-{i}-{k}/25", '1', день.strftime('%d.%m.%Y'), '08:00', '12:00', '', '')
+                for k in range(2)
+            ])
+        except Exception as e:
+            ошибки.append(str(e))
+    try:
+        termoobrabotka.save_records([('общая/25', '2', '01.01.2030', '08:00', '12:00', '', '')])
+        общая = 1
+    except Exception as e:
+        общая = 0
+        if 'уже' not in str(e):
+            ошибки.append(str(e))
+    return общая, ошибки
+
+
+def _проверить_гонку_сканирования():
+    """Сканирование без блокировки, во время которого другая станция
+    дописывает журнал: ни файл состояния, ни запись под блокировкой не
+    должны пропустить ее плавку."""
+    рабочий_каталог = os.getcwd()
+    запись_кэша = termoobrabotka._записать_кэш
+    with tempfile.TemporaryDirectory() as каталог:
+        os.chdir(каталог)
+        try:
+            журнал = termoobrabotka.ФАЙЛ_ЖУРНАЛА
+            termoobrabotka.save_records_to_excel([('1/25', '1', '01.01.2025', '08:00', '10:00')], журнал)
+
+            def с_гонкой(путь, данные):
+                # Между чтением книги и записью файла состояния
+                termoobrabotka._записать_кэш = запись_кэша
+                termoobrabotka.ExcelStorage().append([('2/25', '2', '01.01.2025', '08:00', '10:00')])
+                запись_кэша(путь, данные)
+
+            termoobrabotka._записать_кэш = с_гонкой
+            termoobrabotka.scan_used_plavki(журнал)
+            assert termoobrabotka._записать_кэш is запись_кэша
+            assert termoobrabotka.scan_used_plavki(журнал) == termoobrabotka.get_used_plavki(журнал) == {'1/25', '2/25'}
+
+            # Файл состояния, каким его оставляла гонка до исправления: новая
+            # подпись, старые строки. Запись все равно проверяет саму книгу
+            состояние = termoobrabotka._прочитать_состояние(журнал)
+            состояние.update(строк=2, использованные={'1/25'}, хэш=termoobrabotka._хэш_строки(
+                ('1/25', '1', '01.01.2025', '08:00', '10:00')))
+            termoobrabotka._записать_состояние(журнал, состояние, termoobrabotka.подпись_файла(журнал))
+            хранилище = termoobrabotka.ExcelStorage()
+            assert '2/25' not in хранилище.known_plavki() | хранилище.каталог.использованные
+            try:
+                хранилище.append([('2/25', '2', '02.01.2025', '08:00', '10:00')])
+            except Exception as e:
+                assert 'уже' in str(e), e
+            else:
+                raise AssertionError("плавка 2/25 записана дважды")
+            assert [запись[0] for запись in termoobrabotka.read_journal_records(журнал)] == ['1/25', '2/25']
+        finally:
+            termoobrabotka._записать_кэш = запись_кэша
+            os.chdir(рабочий_каталог)
+
+
+def bench_concurrent(процессов, сохранений, хранилища, без_блокировки):
+    """N процессов одновременно дописывают журнал: строки не теряются и не
+    дублируются, общую плавку записывает ровно одна станция."""
+    print(f"{'хранилище':<10} {'процессов':>9} {'ожидалось':>9} {'записано':>9} "
+          f"{'повторов':>9} {'общая':>6} {'время, с':>9}")
+    if 'excel' in хранилища and not без_блокировки:
+        _проверить_гонку_сканирования()
+    код = 0
+    контекст = multiprocessing.get_context('spawn')
+    for хранилище in хранилища:
+        with tempfile.TemporaryDirectory() as каталог:
+            плавки = [f"{номер}-{i}-{k}/25" for номер in range(процессов)
+                      for i in range(сохранений) for k in range(2)] + ['общая/25']
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Плавки")
+            ws.append(['Дата', 'Номер плавки'])
+            for плавка in плавки:
+                ws.append(['01.01.2025', плавка])
+            wb.save(os.path.join(каталог, termoobrabotka.ФАЙЛ_ПЛАВОК))
+
+            with контекст.Manager() as менеджер:
+                старт = менеджер.Event()
+                with контекст.Pool(процессов) as pool:
+                    задачи = [pool.apply_async(_станция, (номер, сохранений, каталог, хранилище,
+                                                         без_блокировки, старт))
+                              for номер in range(процессов)]
+                    time.sleep(0.5)
+                    начало = time.perf_counter()
+                    старт.set()
+                    результаты = [задача.get() for задача in задачи]
+                    длительность = time.perf_counter() - начало
+
+            рабочий_каталог = os.getcwd()
+            os.chdir(каталог)
+            try:
+                if хранилище == 'sqlite':
+                    записи = list(termoobrabotka.SQLiteStorage().records())
+                else:
+                    записи = list(termoobrabotka.read_journal_records())
+            finally:
+                os.chdir(рабочий_каталог)
+            номера = [запись[0] for запись in записи]
+            повторов = len(номера) - len(set(номера))
+            общая = sum(р[0] for р in результаты)
+            ошибки = [о for р in результаты for о in р[1]]
+            ожидалось = процессов * сохранений * 2 + 1
+            print(f"{хранилище:<10} {процессов:>9} {ожидалось:>9} {len(номера):>9} "
+                  f"{повторов:>9} {общая:>6} {длительность:>9.1f}")
+            for ошибка in ошибки[:5]:
+                print(f"  {ошибка}")
+            if len(номера) != ожидалось or повторов or общая != 1 or ошибки:
+                код = 1
+    return код
+
+
+def bench_archive(лет, строк_в_году):
+    """Сохранение и полный проход журнала за несколько лет до и после переноса
+    закрытых лет в архивы; архивы вместе с журналом дают ту же историю, а
+    оформление листа Records остается."""
+    год = int(os.environ['TERMO_YEAR'])
+    рабочий_каталог = os.getcwd()
+    with tempfile.TemporaryDirectory() as каталог:
+        os.chdir(каталог)
+        try:
+            журнал = termoobrabotka.ФАЙЛ_ЖУРНАЛА
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Records")
+            # В write_only оформление задается до первой строки
+            ws.freeze_panes = 'A2'
+            ws.column_dimensions['A'].width = 18
+            ws.auto_filter.ref = f"A1:G{лет * строк_в_году + 1}"
+            ws.append(termoobrabotka.ЗАГОЛОВКИ)
+            история = []
+            for год_записи in range(год - лет + 1, год + 1):
+                начало_года = datetime.date(год_записи, 1, 1)
+                for i in range(строк_в_году):
+                    дата = начало_года + datetime.timedelta(days=i * 365 // строк_в_году)
+                    запись = (f"{i % 12 + 1}-{i}/{год_записи % 100:02d}", str(i % 2 + 1),
+                              дата.strftime('%d.%m.%Y'), "08:00", "12:00", "", "")
+                    история.append(запись)
+                    ws.append(запись)
+            wb.save(журнал)
+
+            def замер_журнала():
+                начало = time.perf_counter()
+                termoobrabotka.get_used_plavki(журнал)
+                проход = time.perf_counter() - начало
+                shutil.copy(журнал, 'копия.xlsx')
+                начало = time.perf_counter()
+                termoobrabotka.save_records_to_excel([('1-0/99', '1', f'31.12.{год}', '08:00', '12:00')], 'копия.xlsx')
+                return проход, time.perf_counter() - начало
+
+            проход_до, запись_до = замер_журнала()
+            начало = time.perf_counter()
+            перенесено = termoobrabotka.archive_closed_years(журнал)
+            перенос = time.perf_counter() - начало
+            проход_после, запись_после = замер_журнала()
+
+            # Прошлый год остается в журнале вместе с активным
+            закрытые = range(год - лет + 1, год - termoobrabotka.ЛЕТ_ДОСТУПНО + 1)
+            assert перенесено == {г: строк_в_году for г in закрытые}
+            assert list(termoobrabotka.ExcelStorage().all_records()) == история
+            # Повторный перенос ничего не меняет
+            assert termoobrabotka.archive_closed_years(журнал) == {}
+            assert len(termoobrabotka.файлы_архива(журнал)) == len(закрытые)
+            wb = load_workbook(журнал)
+            ws = wb["Records"]
+            assert ws.freeze_panes == 'A2' and ws.column_dimensions['A'].width == 18
+            assert ws.auto_filter.ref == f"A1:G{ws.max_row}", ws.auto_filter.ref
+            wb.close()
+        finally:
+            os.chdir(рабочий_каталог)
+
+    print(f"лет: {лет}, строк в году: {строк_в_году}, перенос: {перенос:.1f} с")
+    print(f"{'журнал':<16} {'полный проход, с':>17} {'сохранение, с':>14}")
+    print(f"{'все годы':<16} {проход_до:>17.2f} {запись_до:>14.2f}")
+    print(f"{'доступные годы':<16} {проход_после:>17.2f} {запись_после:>14.2f}")
+
+
+КАТАЛОГ_ДАННЫХ = 'bench_data'
+ФАЙЛ_БАЗОВОЙ_ЛИНИИ = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks_baseline.json')
+МАРКИ = ['20Л', '25Л', '35Л', '20ГЛ', '35ХМЛ', '110Г13Л']
+
+
+def создать_данные(каталог, количество_строк, seed=1):
+    """Реалистичные plavka.xlsx и termoobrabotka.xlsx по количество_строк строк.
+
+    Плавки года TERMO_YEAR с номерами "месяц-номер/ГГ", марками и массой.
+    Журнал - те же плавки по порядку, загрузками по 10 (печь 1) и 9 (печь 2)
+    плавок; на каждой печи циклы идут друг за другом без пересечений,
+    у 30% загрузок второго цикла нет. Последние 10% плавок не обработаны -
+    они и есть доступные. Готовые файлы того же размера переиспользуются.
+    """
+    файл_плавок = os.path.join(каталог, termoobrabotka.ФАЙЛ_ПЛАВОК)
+    файл_журнала = os.path.join(каталог, termoobrabotka.ФАЙЛ_ЖУРНАЛА)
+    if os.path.exists(файл_плавок) and os.path.exists(файл_журнала):
+        return файл_плавок, файл_журнала
+    os.makedirs(каталог, exist_ok=True)
+    генератор = random.Random(seed)
+    год = int(os.environ['TERMO_YEAR'])
+    начало_года = datetime.datetime(год, 1, 1)
+
+    плавки = []
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Плавки")
+    ws.append(['Дата', 'Номер плавки', 'Марка', 'Масса'])
+    for i in range(количество_строк):
+        дата = начало_года + datetime.timedelta(days=i * 365 // количество_строк)
+        плавки.append(f"{дата.month}-{i + 1}/{год % 100:02d}")
+        ws.append([дата.strftime('%d.%m.%Y'), плавки[-1], генератор.choice(МАРКИ),
+                   генератор.randrange(800, 2500, 10)])
+    wb.save(файл_плавок)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Records")
+    ws.append(termoobrabotka.ЗАГОЛОВКИ)
+    свободна_с = {'1': начало_года, '2': начало_года}
+    обработано = количество_строк * 9 // 10
+    i = 0
+    печь = '1'
+    while i < обработано:
+        начало1 = свободна_с[печь]
+        конец1 = начало1 + datetime.timedelta(minutes=генератор.randrange(180, 600))
+        if генератор.random() < 0.7:
+            начало2 = конец1 + datetime.timedelta(minutes=генератор.randrange(30, 240))
+            конец2 = начало2 + datetime.timedelta(minutes=генератор.randrange(60, 300))
+            второй = [начало2.strftime('%H:%M'), конец2.strftime('%H:%M')]
+        else:
+            конец2 = конец1
+            второй = ['', '']
+        свободна_с[печь] = конец2 + datetime.timedelta(minutes=генератор.randrange(30, 240))
+        for плавка in плавки[i:min(i + (10 if печь == '1' else 9), обработано)]:
+            ws.append([плавка, печь, начало1.strftime('%d.%m.%Y'),
+                       начало1.strftime('%H:%M'), конец1.strftime('%H:%M'), *второй])
+        i += 10 if печь == '1' else 9
+        печь = '2' if печь == '1' else '1'
+    wb.save(файл_журнала)
+    return файл_плавок, файл_журнала
+
+
+def bench_generate(строки, каталог_данных):
+    for количество_строк in строки:
+        начало = time.perf_counter()
+        файлы = создать_данные(os.path.join(каталог_данных, str(количество_строк)), количество_строк)
+        размер = sum(os.path.getsize(f) for f in файлы)
+        print(f"{количество_строк:>9} строк: {размер / 2**20:.1f} МБ, {time.perf_counter() - начало:.1f} с")
+
+
+def _замер_случая(подготовка, функция, повторов):
+    """Лучшее время из повторов и пик Python-аллокаций отдельным прогоном."""
+    лучшее = None
+    for _ in range(повторов):
+        подготовка()
+        начало = time.perf_counter()
+        функция()
+        время = time.perf_counter() - начало
+        лучшее = время if лучшее is None else min(лучшее, время)
+    подготовка()
+    tracemalloc.start()
+    функция()
+    _, пик = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return лучшее, пик
+
+
+def _случаи_журнала(исходный_журнал, окно):
+    """(название, подготовка, функция) для путей чтения и записи журнала.
+
+    Выполняются в рабочем каталоге с копиями plavka.xlsx и termoobrabotka.xlsx.
+    """
+    def сброс():
+        termoobrabotka._хранилище = None
+
+    def холодный():
+        сброс()
+        for кэш in (termoobrabotka.файл_состояния_сканирования(termoobrabotka.ФАЙЛ_ЖУРНАЛА),
+                    termoobrabotka.файл_кэша_плавок(termoobrabotka.ФАЙЛ_ПЛАВОК)):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(кэш)
+
+    def перезапуск():
+        # Как новый сеанс формы: файлы кэша остались от прошлого
+        if not os.path.exists(termoobrabotka.файл_состояния_сканирования(termoobrabotka.ФАЙЛ_ЖУРНАЛА)):
+            termoobrabotka.get_available_plavki()
+        сброс()
+
+    def свежий_журнал():
+        shutil.copy(исходный_журнал, termoobrabotka.ФАЙЛ_ЖУРНАЛА)
+        холодный()
+
+    def обновить_поля():
+        загружено = []
+        окно.plavki_loaded.connect(lambda: загружено.append(1))
+        окно.update_plavka_fields('1')
+        while not загружено:
+            окно.app.processEvents()
+            time.sleep(0.001)
+        окно.plavki_loaded.disconnect()
+
+    год = int(os.environ['TERMO_YEAR'])
+    return [
+        ('get_existing_plavki', lambda: None, termoobrabotka.get_existing_plavki),
+        ('get_available_plavki', холодный, termoobrabotka.get_available_plavki),
+        ('get_available_plavki/перезапуск', перезапуск, termoobrabotka.get_available_plavki),
+        ('save_to_excel', свежий_журнал, lambda: termoobrabotka.save_to_excel(
+            f"12-0/{год % 100:02d}", '1', f"31.12.{год}", '08:00', '12:00')),
+        ('update_plavka_fields', холодный, обновить_поля),
+    ]
+
+
+def _форма():
+    from PySide6.QtWidgets import QApplication
+    import termoobrabotka_gui
+
+    app = QApplication.instance() or QApplication([])
+    окно = termoobrabotka_gui.MainWindow()
+    окно.app = app
+    return окно
+
+
+def bench_suite(строки, каталог_данных, повторов, файл_базовой, сохранить, допуск):
+    """Пути журнала на данных разного размера: время, пик памяти, сравнение
+    с базовой линией. Возвращает 1, если что-то медленнее базовой больше
+    чем в допуск раз (и больше чем на 5 мс), иначе 0.
+    """
+    os.environ['TERMO_STORAGE'] = 'excel'
+    базовая = {}
+    if os.path.exists(файл_базовой):
+        with open(файл_базовой, encoding='utf-8') as f:
+            базовая = json.load(f)
+    окно = _форма()
+    каталог_данных = os.path.abspath(каталог_данных)
+    рабочий_каталог = os.getcwd()
+    результаты = {}
+    регрессии = []
+    print(f"{'случай':<32} {'строк':>8} {'время, мс':>11} {'пик, МБ':>9} {'к базовой':>10}")
+    try:
+        for количество_строк in строки:
+            файл_плавок, файл_журнала = создать_данные(
+                os.path.join(каталог_данных, str(количество_строк)), количество_строк)
+            with tempfile.TemporaryDirectory() as каталог:
+                os.chdir(каталог)
+                shutil.copy(файл_плавок, termoobrabotka.ФАЙЛ_ПЛАВОК)
+                shutil.copy(файл_журнала, termoobrabotka.ФАЙЛ_ЖУРНАЛА)
+                for название, подготовка, функция in _случаи_журнала(файл_журнала, окно):
+                    время, пик = _замер_случая(
+                        подготовка, функция, повторов if количество_строк < 100000 else 1)
+                    ключ = f"{название}@{количество_строк}"
+                    результаты[ключ] = {'time_s': round(время, 6), 'peak_mb': round(пик / 2**20, 2)}
+                    сравнение = ''
+                    if ключ in базовая.get('cases', {}):
+                        было = базовая['cases'][ключ]['time_s']
+                        сравнение = f"x{время / было:.2f}" if было else ''
+                        if время > было * допуск and время - было > 0.005:
+                            регрессии.append(ключ)
+                            сравнение += ' !'
+                    print(f"{название:<32} {количество_строк:>8} {время * 1000:>11.1f} "
+                          f"{пик / 2**20:>9.1f} {сравнение:>10}")
+                os.chdir(рабочий_каталог)
+    finally:
+        os.chdir(рабочий_каталог)
+        termoobrabotka._хранилище = None
+        окно.close()
+
+    if сохранить:
+        import openpyxl
+        from PySide6 import __version__ as версия_pyside
+
+        базовая.setdefault('cases', {}).update(результаты)
+        базовая.update({
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'machine': platform.machine(), 'openpyxl': openpyxl.__version__,
+            'pyside6': версия_pyside,
+        })
+        базовая['cases'] = dict(sorted(базовая['cases'].items()))
+        with open(файл_базовой, 'w', encoding='utf-8') as f:
+            json.dump(базовая, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"базовая линия записана: {файл_базовой}")
+    if регрессии:
+        print(f"ОШИБКА: медленнее базовой больше чем в {допуск} раза: {', '.join(регрессии)}")
+        return 1
+    return 0
+
+
+# Выполняется в отдельном процессе: импорт модулей должен быть "холодным"
+_ЗАПУСК_ФОРМЫ = r"""
+import json, sys, time
+начало = float(sys.argv[1])
+import termoobrabotka
+замеры = {'импорт': time.time() - начало,
+          'загружены_при_импорте': sorted(m for m in ('PySide6', 'openpyxl', 'numpy') if m in sys.modules)}
+import termoobrabotka_gui
+from PySide6.QtCore import QEvent, QObject
+from PySide6.QtWidgets import QApplication
+
+class ПерваяОтрисовка(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and 'первая_отрисовка' not in замеры:
+            замеры['первая_отрисовка'] = time.time() - начало
+        return False
+
+def готово():
+    замеры['плавки_загружены'] = time.time() - начало
+    app.quit()
+
+app = QApplication(sys.argv[:1])
+window = termoobrabotka_gui.MainWindow()
+фильтр = ПерваяОтрисовка()
+window.installEventFilter(фильтр)
+window.plavki_loaded.connect(готово)
+window.show()
+app.exec()
+window.пул.waitForDone()
+print(json.dumps(замеры))
+"""
+
+
+def bench_startup(количество_плавок, количество_строк, макс_отрисовка, макс_готовность, повторов=3):
+    """Запуск формы: импорт, первая отрисовка окна и готовность плавок.
+
+    Возвращает 1, если медиана превысила порог, иначе 0.
+    """
+    import json
+    import statistics
+
+    каталог_кода = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', TERMO_STORAGE='excel',
+               PYTHONPATH=os.pathsep.join(filter(None, [каталог_кода, os.environ.get('PYTHONPATH')])))
+    with tempfile.TemporaryDirectory() as каталог:
+        создать_плавки(os.path.join(каталог, termoobrabotka.ФАЙЛ_ПЛАВОК), количество_плавок)
+        создать_журнал(os.path.join(каталог, termoobrabotka.ФАЙЛ_ЖУРНАЛА), количество_строк)
+        прогоны = []
+        for _ in range(повторов):
+            результат = subprocess.run(
+                [sys.executable, '-c', _ЗАПУСК_ФОРМЫ, repr(time.time())],
+                cwd=каталог, env=env, capture_output=True, text=True, check=True
+            )
+            прогоны.append(json.loads(результат.stdout.strip().splitlines()[-1]))
+
+    лишние = прогоны[0]['загружены_при_импорте']
+    медианы = {ключ: statistics.median(п[ключ] for п in прогоны)
+               for ключ in ('импорт', 'первая_отрисовка', 'плавки_загружены')}
+    print(f"плавок: {количество_плавок}, строк журнала: {количество_строк}, прогонов: {повторов}")
+    print(f"{'этап':<24} {'от запуска, с':>14}")
+    for ключ, значение in медианы.items():
+        print(f"{ключ:<24} {значение:>14.3f}")
+
+    код = 0
+    if лишние:
+        print(f"ОШИБКА: import termoobrabotka загружает {', '.join(лишние)}")
+        код = 1
+    if медианы['первая_отрисовка'] > макс_отрисовка:
+        print(f"ОШИБКА: первая отрисовка дольше {макс_отрисовка} с")
+        код = 1
+    if медианы['плавки_загружены'] > макс_готовность:
+        print(f"ОШИБКА: плавки загружены дольше чем за {макс_готовность} с")
+        код = 1
+    return код
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    save = commands.add_parser('save', help='по одной строке против пакетной записи')
+    save.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    save.add_argument('--heats', type=int, default=10)
+
+    scan = commands.add_parser('scan', help='полное и потоковое чтение столбца плавок')
+    scan.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+
+    tail = commands.add_parser('tail', help='полный проход Records против дочитывания хвоста')
+    tail.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+
+    fields = commands.add_parser('fields', help='обновление полей плавок в форме')
+    fields.add_argument('--heats', type=int, default=5000)
+
+    search = commands.add_parser('search', help='поиск плавок по префиксу')
+    search.add_argument('--heats', type=int, nargs='+', default=[5000, 100000])
+
+    import_csv = commands.add_parser('import', help='импорт загрузок печей из CSV')
+    import_csv.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+
+    report = commands.add_parser('report', help='сводка по журналу: numpy против цикла')
+    report.add_argument('--rows', type=int, nargs='+', default=[10000, 1000000])
+
+    schedule = commands.add_parser('schedule', help='проверка пересечений циклов печей')
+    schedule.add_argument('--intervals', type=int, nargs='+', default=[100000, 1000000])
+
+    log = commands.add_parser('log', help='цена записи замера в журнал')
+    log.add_argument('--calls', type=int, default=100000)
+
+    concurrent = commands.add_parser('concurrent', help='одновременная запись с нескольких станций')
+    concurrent.add_argument('--processes', type=int, default=8)
+    concurrent.add_argument('--saves', type=int, default=10)
+    concurrent.add_argument('--storage', nargs='+', default=['excel', 'sqlite'])
+    concurrent.add_argument('--no-lock', action='store_true', help='без блокировки - для сравнения')
+
+    archive = commands.add_parser('archive', help='журнал за несколько лет до и после переноса в архивы')
+    archive.add_argument('--years', type=int, default=5)
+    archive.add_argument('--rows-per-year', type=int, default=20000)
+
+    generate = commands.add_parser('generate', help='создать plavka.xlsx и termoobrabotka.xlsx для suite')
+    generate.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    generate.add_argument('--data', default=КАТАЛОГ_ДАННЫХ)
+
+    suite = commands.add_parser('suite', help='пути журнала на 1k-1M строк и сравнение с базовой линией')
+    suite.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    suite.add_argument('--data', default=КАТАЛОГ_ДАННЫХ)
+    suite.add_argument('--repeat', type=int, default=3, help='повторов до 100k строк (дальше - один)')
+    suite.add_argument('--baseline', default=ФАЙЛ_БАЗОВОЙ_ЛИНИИ)
+    suite.add_argument('--save-baseline', action='store_true', help='записать результаты в базовую линию')
+    suite.add_argument('--tolerance', type=float, default=1.5)
+
+    startup = commands.add_parser('startup', help='время запуска формы (ненулевой код при регрессии)')
+    startup.add_argument('--heats', type=int, default=5000)
+    startup.add_argument('--rows', type=int, default=10000)
+    startup.add_argument('--max-first-paint', type=float, default=1.0)
+    startup.add_argument('--max-ready', type=float, default=5.0)
+
+    args = parser.parse_args(argv)
+    if args.command == 'save':
+        bench_save(args.rows, args.heats)
+    elif args.command == 'scan':
+        bench_scan(args.rows)
+    elif args.command == 'tail':
+        bench_tail(args.rows)
+    elif args.command == 'fields':
+        bench_fields(args.heats)
+    elif args.command == 'search':
+        bench_search(args.heats)
+    elif args.command == 'import':
+        bench_import(args.rows)
+    elif args.command == 'report':
+        bench_report(args.rows)
+    elif args.command == 'schedule':
+        bench_schedule(args.intervals)
+    elif args.command == 'log':
+        bench_log(args.calls)
+    elif args.command == 'concurrent':
+        return bench_concurrent(args.processes, args.saves, args.storage, args.no_lock)
+    elif args.command == 'archive':
+        bench_archive(args.years, args.rows_per_year)
+    elif args.command == 'generate':
+        bench_generate(args.rows, args.data)
+    elif args.command == 'suite':
+        return bench_suite(args.rows, args.data, args.repeat, args.baseline,
+                           args.save_baseline, args.tolerance)
+    elif args.command == 'startup':
+        return bench_startup(args.heats, args.rows, args.max_first_paint, args.max_ready)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,424 +1,2139 @@
 import sys
 import os
-from PySide6.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QLineEdit,
-    QPushButton, QMessageBox, QLabel, QComboBox, QDateEdit, QHBoxLayout
-)
-from PySide6.QtCore import Qt, QDate
-from openpyxl import Workbook, load_workbook
-from PySide6.QtGui import QPalette, QColor, QFont
-
-# Функция для сохранения данных в Excel
-def save_to_excel(номер_плавки, термообработка_номер_печи, термообработка_дата,
-                 термообработка_начало_первого_цикла, термообработка_конец_первого_цикла,
-                 термообработка_начало_второго_цикла="", термообработка_конец_второго_цикла=""):
+import argparse
+import bisect
+import contextlib
+import csv
+import datetime
+import functools
+import glob
+import hashlib
+import inspect
+import itertools
+import json
+import operator
+import random
+import shutil
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Qt (форма - в termoobrabotka_gui) и openpyxl не импортируются при загрузке
+# модуля: функции журнала доступны без Qt, а форма появляется, не дожидаясь
+# openpyxl. Книги открываются через обертки ниже.
+def load_workbook(*args, **kwargs):
+    from openpyxl import load_workbook as _load_workbook
+    return _load_workbook(*args, **kwargs)
+
+
+def Workbook(*args, **kwargs):
+    from openpyxl import Workbook as _Workbook
+    return _Workbook(*args, **kwargs)
+
+
+ФАЙЛ_ЖУРНАЛА = 'termoobrabotka.xlsx'
+ФАЙЛ_ПЛАВОК = 'plavka.xlsx'
+ФАЙЛ_БАЗЫ = 'termoobrabotka.db'
+ФАЙЛ_ЛОГА = 'termoobrabotka.log'
+# Полей плавок у печи 1; у печи 2 на одно меньше
+МАКС_ПОЛЕЙ_ПЛАВОК = 10
+# Сколько подсказок показывать при наборе номера плавки
+МАКС_ПОДСКАЗОК = 50
+ЗАГОЛОВКИ = ['Номер плавки', 'Номер печи', 'Дата',
+             'Начало первого цикла', 'Конец первого цикла',
+             'Начало второго цикла', 'Конец второго цикла']
+
+
+# Плавки скольких лет доступны: активного и прошлого, чтобы 1 января не
+# пропадали еще не обработанные плавки прошлого года
+ЛЕТ_ДОСТУПНО = 2
+
+
+def активный_год():
+    """Последний год, плавки которого доступны: TERMO_YEAR или текущий календарный."""
+    return int(os.environ.get('TERMO_YEAR') or datetime.date.today().year)
+
+
+def доступные_годы(год=None):
+    """Годы, плавки которых можно выбрать: активный и ЛЕТ_ДОСТУПНО - 1 предыдущих.
+
+    Строки журнала более ранних лет переносятся в архивы (archive_closed_years).
+    """
+    год = год or активный_год()
+    return tuple(range(год, год - ЛЕТ_ДОСТУПНО, -1))
+
+
+def фильтр_года(год=None):
+    """Признак плавки года в ее номере: 2025 -> '/25'."""
+    return f"/{(год or активный_год()) % 100:02d}"
+
+
+def плавка_доступного_года(плавка, год=None):
+    """Есть ли в номере плавки признак одного из доступных лет."""
+    return any(фильтр_года(г) in плавка for г in доступные_годы(год))
+
+
+# Журнал замеров: по JSON-строке на операцию (op, ms, rows, file, bytes).
+# Файл задается TERMO_LOG, пустое значение отключает запись. При
+# TERMO_PROFILE=<каталог> внешние замеры еще и профилируются cProfile.
+_лог = None
+_блокировка_лога = threading.Lock()
+_поток = threading.local()
+
+
+def _размер(file_name):
+    подпись = подпись_файла(file_name)
+    return подпись[1] if подпись else None
+
+
+def записать_замер(операция, мс, **поля):
+    file_name = os.environ.get('TERMO_LOG', ФАЙЛ_ЛОГА)
+    if not file_name:
+        return
+    строка = json.dumps({
+        'ts': datetime.datetime.now().isoformat(timespec='milliseconds'),
+        'op': операция, 'ms': round(мс, 3), 'pid': os.getpid(), **поля
+    }, ensure_ascii=False, default=str)
+    global _лог
+    with _блокировка_лога:
+        try:
+            if _лог is None or _лог.name != file_name:
+                if _лог is not None:
+                    _лог.close()
+                # Построчная буферизация: строка уходит в файл одной записью
+                _лог = open(file_name, 'a', encoding='utf-8', buffering=1)
+            _лог.write(строка + '\n')
+        except OSError:
+            pass  # Замеры не должны мешать работе с журналом
+
+
+def _начать_профиль():
+    if not os.environ.get('TERMO_PROFILE'):
+        return None
+    import cProfile
+    профиль = cProfile.Profile()
+    try:
+        профиль.enable()
+    except ValueError:
+        return None  # С Python 3.12 профилировщик может быть включен только в одном потоке
+    return профиль
+
+
+def _сохранить_профиль(профиль, операция):
+    профиль.disable()
+    каталог = os.environ['TERMO_PROFILE']
+    try:
+        os.makedirs(каталог, exist_ok=True)
+        профиль.dump_stats(os.path.join(каталог, f"{операция}-{os.getpid()}-{time.time_ns()}.prof"))
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def замер(операция, **поля):
+    """Замеряет блок и пишет строку в журнал замеров.
+
+    Тело (и вызываемые из него функции через поля_замера) может дописать
+    поля: rows, bytes, mode. Исключение записывается в error и уходит дальше.
+    """
+    стек = _поток.__dict__.setdefault('замеры', [])
+    профиль = None if стек else _начать_профиль()
+    стек.append(поля)
+    начало = time.perf_counter()
+    try:
+        yield поля
+    except Exception as e:
+        поля['error'] = str(e)
+        raise
+    finally:
+        мс = (time.perf_counter() - начало) * 1000
+        стек.pop()
+        if профиль is not None:
+            _сохранить_профиль(профиль, операция)
+        записать_замер(операция, мс, **поля)
+
+
+def поля_замера():
+    """Поля текущего замера в этом потоке (вне замера - ничего не значащий словарь)."""
+    стек = _поток.__dict__.get('замеры')
+    return стек[-1] if стек else {}
+
+
+def замеряется(операция, файл=None):
+    """Декоратор: вызов функции - один замер.
+
+    файл - имя параметра с именем книги: в замер попадут file и bytes.
+    rows - длина результата-списка или множества, если тело не задало
+    свое. У генератора замер длится до конца перебора (вместе с обработкой
+    строк вызывающим) и rows - число выданных значений.
+    """
+    def декоратор(функция):
+        сигнатура = inspect.signature(функция)
+
+        def имя_файла(args, kwargs):
+            if файл is None:
+                return None
+            аргументы = сигнатура.bind(*args, **kwargs)
+            аргументы.apply_defaults()
+            return аргументы.arguments[файл]
+
+        if inspect.isgeneratorfunction(функция):
+            @functools.wraps(функция)
+            def генератор(*args, **kwargs):
+                file_name = имя_файла(args, kwargs)
+                начало = time.perf_counter()
+                строк = 0
+                # Не в стеке замеров: генератор могут бросить недочитанным
+                try:
+                    for значение in функция(*args, **kwargs):
+                        строк += 1
+                        yield значение
+                finally:
+                    поля = {'rows': строк}
+                    if file_name is not None:
+                        поля.update(file=file_name, bytes=_размер(file_name))
+                    записать_замер(операция, (time.perf_counter() - начало) * 1000, **поля)
+            return генератор
+
+        @functools.wraps(функция)
+        def обертка(*args, **kwargs):
+            file_name = имя_файла(args, kwargs)
+            with замер(операция) as поля:
+                результат = функция(*args, **kwargs)
+                if 'rows' not in поля and isinstance(результат, (list, set, frozenset)):
+                    поля['rows'] = len(результат)
+                if file_name is not None:
+                    поля.update(file=file_name, bytes=_размер(file_name))
+                return результат
+        return обертка
+    return декоратор
+
+
+def _записать_заголовки(ws):
+    for col, header in enumerate(ЗАГОЛОВКИ, start=1):
+        ws.cell(row=1, column=col, value=header)
+
+
+# umask читается один раз при импорте: узнать ее можно, только установив
+# новую, а это на миг меняет права всех файлов, создаваемых другими потоками
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def _подменить_файл(временный_файл, file_name, попыток=10):
+    """os.replace с повторами: в Windows (и на общих дисках) подмена не
+    проходит, пока файл открыт на чтение другой станцией."""
+    задержка = 0.05
+    for попытка in range(попыток):
+        try:
+            os.replace(временный_файл, file_name)
+            return
+        except PermissionError:
+            if попытка == попыток - 1:
+                raise
+            time.sleep(задержка * random.uniform(0.5, 1.5))
+            задержка = min(задержка * 2, 1.0)
+
+
+def _сохранить_книгу(wb, file_name):
+    """Сохраняет книгу во временный файл и атомарно подменяет им file_name."""
+    # Сохраняем рядом с журналом, чтобы os.replace не пересекал границу тома
+    каталог = os.path.dirname(os.path.abspath(file_name))
+    fd, временный_файл = tempfile.mkstemp(suffix='.xlsx', dir=каталог)
+    os.close(fd)
+    try:
+        wb.save(временный_файл)
+        if os.path.exists(file_name):
+            shutil.copymode(file_name, временный_файл)
+        else:
+            # mkstemp создает файл с правами 0600; новый файл должен быть
+            # доступен другим станциям, как при обычном open
+            os.chmod(временный_файл, 0o666 & ~_UMASK)
+        _подменить_файл(временный_файл, file_name)
+    finally:
+        if os.path.exists(временный_файл):
+            os.remove(временный_файл)
+
+
+def _записать_строки(ws, records, next_row):
+    for row, values in enumerate(records, start=next_row):
+        for col, value in enumerate(values, start=1):
+            cell = ws.cell(row=row, column=col)
+            cell.value = value
+
+            if col == 3:  # Колонка C (дата)
+                cell.number_format = 'DD.MM.YYYY'
+            elif col in [4, 5, 6, 7]:  # Колонки D, E, F, G (время)
+                cell.number_format = 'HH:MM'
+
+
+@замеряется('excel.save', 'file_name')
+def save_records_to_excel(records, file_name=ФАЙЛ_ЖУРНАЛА, проверка=None):
+    """Добавляет все записи за одно открытие/сохранение книги.
+
+    records - последовательность кортежей в порядке ЗАГОЛОВКИ. Книга
+    сохраняется во временный файл и подменяет журнал через os.replace,
+    поэтому на диск попадают либо все строки, либо ни одной.
+    Возвращает номер последней записанной строки листа.
+
+    Это запись в саму книгу, мимо хранилища, блокировки и проверок;
+    журнал термообработки пишется через save_records. проверка(ws), если
+    задана, вызывается с загруженным листом до записи и может отменить ее
+    исключением.
+    """
+    records = [tuple(record) for record in records]
+    поля_замера()['rows'] = len(records)
+    if not records:
+        return None
     try:
         # Если файл не существует, создаем его с заголовками
-        if not os.path.exists('termoobrabotka.xlsx'):
+        if not os.path.exists(file_name):
             wb = Workbook()
             ws = wb.active
             ws.title = "Records"
-            headers = ['Номер плавки', 'Номер печи', 'Дата', 
-                      'Начало первого цикла', 'Конец первого цикла',
-                      'Начало второго цикла', 'Конец второго цикла']
-            for col, header in enumerate(headers, start=1):
-                ws.cell(row=1, column=col, value=header)
+            _записать_заголовки(ws)
         else:
-            wb = load_workbook('termoobrabotka.xlsx')
+            with замер('excel.load', file=file_name, bytes=_размер(file_name)):
+                wb = load_workbook(file_name)
             if "Records" not in wb.sheetnames:
                 ws = wb.create_sheet("Records")
-                headers = ['Номер плавки', 'Номер печи', 'Дата', 
-                          'Начало первого цикла', 'Конец первого цикла',
-                          'Начало второго цикла', 'Конец второго цикла']
-                for col, header in enumerate(headers, start=1):
-                    ws.cell(row=1, column=col, value=header)
+                _записать_заголовки(ws)
             else:
                 ws = wb["Records"]
-            
+
+        if проверка is not None:
+            проверка(ws)
         next_row = ws.max_row + 1
-        
-        values = [номер_плавки, термообработка_номер_печи, термообработка_дата,
-                 термообработка_начало_первого_цикла, термообработка_конец_первого_цикла,
-                 термообработка_начало_второго_цикла, термообработка_конец_второго_цикла]
-        
-        for col, value in enumerate(values, start=1):
-            cell = ws.cell(row=next_row, column=col)
-            cell.value = value
-            
-            if col == 3:  # Колонка C (дата)
-                cell.number_format = 'DD.MM.YYYY'
-            elif col in [4, 5, 6, 7]:  # Колонки D, E, F, G (время)
-                cell.number_format = 'HH:MM'
-        
-        wb.save('termoobrabotka.xlsx')
+        _записать_строки(ws, records, next_row)
+
+        _сохранить_книгу(wb, file_name)
         wb.close()
+        return next_row + len(records) - 1
     except Exception as e:
         raise Exception(f"Ошибка при сохранении в Excel: {str(e)}")
 
-def get_existing_plavki():
-    file_name = 'plavka.xlsx'
+
+# Функция для сохранения данных в журнал (имя осталось от хранения только в Excel)
+def save_to_excel(номер_плавки, термообработка_номер_печи, термообработка_дата,
+                 термообработка_начало_первого_цикла, термообработка_конец_первого_цикла,
+                 термообработка_начало_второго_цикла="", термообработка_конец_второго_цикла=""):
+    save_records([(
+        номер_плавки, термообработка_номер_печи, термообработка_дата,
+        термообработка_начало_первого_цикла, термообработка_конец_первого_цикла,
+        термообработка_начало_второго_цикла, термообработка_конец_второго_цикла
+    )])
+
+@замеряется('excel.plavki', 'file_name')
+def get_existing_plavki(file_name=ФАЙЛ_ПЛАВОК):
     if not os.path.exists(file_name):
         return []
 
-    workbook = load_workbook(file_name)
-    sheet = workbook.active
-    номера_плавок = []
-    
-    for row in sheet.iter_rows(min_row=2, values_only=True):
-        номер_плавки = row[1]  
-        if номер_плавки is not None:
-            номера_плавок.append(str(номер_плавки))
+    # read_only: строки читаются потоком, ячейки и стили не строятся целиком
+    workbook = load_workbook(file_name, read_only=True)
+    try:
+        sheet = workbook.active
+        номера_плавок = []
+
+        # Номер плавки во втором столбце (B)
+        for (номер_плавки,) in sheet.iter_rows(min_row=2, min_col=2, max_col=2, values_only=True):
+            if номер_плавки is not None:
+                номера_плавок.append(str(номер_плавки))
+    finally:
+        workbook.close()
 
     return номера_плавок
 
-def get_available_plavki():
-    # Получаем все номера плавок из plavka.xlsx
-    все_плавки = get_existing_plavki()
-    
-    # Получаем номера плавок, которые уже существуют в termoobrabotka.xlsx
+def файл_кэша_плавок(file_name):
+    return file_name + '.heats.json'
+
+
+@замеряется('excel.plavki_cached', 'file_name')
+def load_existing_plavki(file_name=ФАЙЛ_ПЛАВОК):
+    """Как get_existing_plavki, но список хранится рядом с книгой.
+
+    Кэш <plavka.xlsx>.heats.json привязан к подписи книги (mtime, размер):
+    пока она не менялась, новый сеанс формы не разбирает plavka.xlsx.
+    Подпись берется до чтения, поэтому правка книги во время чтения
+    только заставит перечитать ее в следующий раз.
+    """
+    подпись = подпись_файла(file_name)
+    if подпись is None:
+        return []
+    путь = файл_кэша_плавок(file_name)
+    try:
+        with open(путь, encoding='utf-8') as f:
+            кэш = json.load(f)
+        if tuple(кэш['подпись']) == подпись:
+            поля_замера()['mode'] = 'cached'
+            return [str(плавка) for плавка in кэш['плавки']]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    поля_замера()['mode'] = 'full'
+    плавки = get_existing_plavki(file_name)
+    _записать_кэш(путь, {'подпись': подпись, 'плавки': плавки})
+    return плавки
+
+
+@замеряется('excel.scan_full', 'file_name')
+def get_used_plavki(file_name=ФАЙЛ_ЖУРНАЛА):
+    """Номера плавок, которые уже есть в листе Records журнала."""
     существующие_плавки = set()
-    file_name = 'termoobrabotka.xlsx'
     if os.path.exists(file_name):
-        workbook = load_workbook(file_name)
-        if "Records" in workbook.sheetnames:
-            sheet = workbook["Records"]
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                существующие_плавки.add(row[0])  # Первый столбец содержит номер плавки
-
-    # Фильтруем номера плавок, оставляя только те, которые отсутствуют в termoobrabotka.xlsx и имеют "/25"
-    доступные_плавки = [
-        плавка for плавка in все_плавки 
-        if плавка not in существующие_плавки and '/25' in плавка
-    ]
-
-    # Сортируем по убыванию
-    доступные_плавки.sort(reverse=True)
-
-    # Отладочные сообщения
-    print(f"Все плавки: {все_плавки}")
-    print(f"Существующие плавки: {существующие_плавки}")
-    print(f"Доступные плавки: {доступные_плавки}")
-
-    return доступные_плавки
-
-
-class MainWindow(QWidget):
-    def __init__(self):
-        super().__init__()
-        self.plавка_fields = []
-        
-        self.setWindowTitle("Электронный журнал термообработки")
-        self.setMinimumWidth(600)  # Уменьшаем минимальную ширину
-        self.setMinimumHeight(400)  # Уменьшаем минимальную высоту
-        
-        # Обновляем стили для более компактного вида
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #1a1a1a;
-                color: #ffffff;
-                font-family: 'Arial';
-            }
-            QLabel {
-                color: #00ffff;
-                font-size: 12px;  /* Уменьшаем размер шрифта */
-                padding: 5px;     /* Уменьшаем отступы */
-                border: 1px solid #00ffff;
-                border-radius: 3px;
-                background-color: #2a2a2a;
-                margin: 1px;      /* Добавляем минимальные внешние отступы */
-            }
-            QComboBox {
-                background-color: #2a2a2a;
-                border: 1px solid #00ffff;
-                border-radius: 3px;
-                padding: 3px;
-                color: #ffffff;
-                min-height: 20px; /* Уменьшаем минимальную высоту */
-                margin: 1px;
-            }
-            QComboBox::drop-down {
-                border: none;
-                width: 20px;
-            }
-            QLineEdit {
-                background-color: #2a2a2a;
-                border: 1px solid #00ffff;
-                border-radius: 3px;
-                padding: 3px;
-                color: #ffffff;
-                min-height: 20px;
-                margin: 1px;
-            }
-            QDateEdit {
-                background-color: #2a2a2a;
-                border: 1px solid #00ffff;
-                border-radius: 3px;
-                padding: 3px;
-                color: #ffffff;
-                min-height: 20px;
-                margin: 1px;
-            }
-            QPushButton {
-                background-color: #00ffff;
-                color: #000000;
-                border: none;
-                border-radius: 3px;
-                padding: 5px;
-                font-size: 12px;
-                font-weight: bold;
-                min-height: 25px;
-                margin: 1px;
-            }
-            QPushButton:hover {
-                background-color: #00cccc;
-            }
-        """)
-
-        layout = QVBoxLayout()
-        layout.setSpacing(2)  # Уменьшаем расстояние между элементами
-        layout.setContentsMargins(5, 5, 5, 5)  # Уменьшаем отступы от краёв
-
-        # Заголовок
-        title = QLabel("ЭЛЕКТРОННЫЙ ЖУРНАЛ ТЕРМООБРАБОТКИ")
-        title.setStyleSheet("""
-            QLabel {
-                font-size: 16px;
-                font-weight: bold;
-                color: #00ffff;
-                border: 2px solid #00ffff;
-                padding: 5px;
-                background-color: #2a2a2a;
-            }
-        """)
-        title.setAlignment(Qt.AlignCenter)
-        layout.addWidget(title)
-
-        # Создаем горизонтальные контейнеры для группировки элементов
-        top_container = QWidget()
-        top_layout = QHBoxLayout(top_container)
-        top_layout.setSpacing(2)
-        top_layout.setContentsMargins(0, 0, 0, 0)
-
-        # Левая часть с печью и плавками
-        left_container = QWidget()
-        left_layout = QVBoxLayout(left_container)
-        left_layout.setSpacing(2)
-        left_layout.setContentsMargins(0, 0, 0, 0)
-
-        печь_label = QLabel("НОМЕР ПЕЧИ")
-        печь_label.setAlignment(Qt.AlignCenter)
-        left_layout.addWidget(печь_label)
-
-        self.термообработка_номер_печи = QComboBox()
-        self.термообработка_номер_печи.addItems(['1', '2'])
-        self.термообработка_номер_печи.currentTextChanged.connect(self.update_plavka_fields)
-        left_layout.addWidget(self.термообработка_номер_печи)
-
-        # Контейнер для плавок
-        self.plавка_container = QWidget()
-        self.plавка_layout = QVBoxLayout(self.plавка_container)
-        self.plавка_layout.setSpacing(2)
-        self.plавка_layout.setContentsMargins(0, 0, 0, 0)
-        left_layout.addWidget(self.plавка_container)
-
-        top_layout.addWidget(left_container)
-
-        # Правая часть с датой и циклами
-        right_container = QWidget()
-        right_layout = QVBoxLayout(right_container)
-        right_layout.setSpacing(2)
-        right_layout.setContentsMargins(0, 0, 0, 0)
-
-        дата_label = QLabel("ТЕРМООБРАБОТКА")
-        дата_label.setAlignment(Qt.AlignCenter)
-        дата_label.setStyleSheet("""
-            QLabel {
-                color: #000000;
-                font-size: 32px;
-                font-weight: bold;
-                padding: 5px;
-                border: 1px solid #00ffff;
-                border-radius: 3px;
-                background-color: #2a2a2a;
-                margin: 1px;
-                background-image: url(termo.png);
-                background-position: center;
-                background-repeat: no-repeat;
-                background-origin: content;
-            }
-        """)
-        right_layout.addWidget(дата_label)
-
-        self.термообработка_дата = QDateEdit()
-        self.термообработка_дата.setDisplayFormat("dd.MM.yyyy")
-        self.термообработка_дата.setCalendarPopup(True)
-        self.термообработка_дата.setDate(QDate.currentDate())
-        right_layout.addWidget(self.термообработка_дата)
-
-        # Контейнер для циклов
-        cycles_container = QWidget()
-        cycles_layout = QHBoxLayout(cycles_container)
-        cycles_layout.setSpacing(2)
-        cycles_layout.setContentsMargins(0, 0, 0, 0)
-
-        # Первый цикл
-        cycle1_container = QWidget()
-        cycle1_layout = QVBoxLayout(cycle1_container)
-        cycle1_layout.setSpacing(2)
-        cycle1_layout.setContentsMargins(0, 0, 0, 0)
-
-        цикл1_label = QLabel("ПЕРВЫЙ ЦИКЛ")
-        цикл1_label.setAlignment(Qt.AlignCenter)
-        cycle1_layout.addWidget(цикл1_label)
-
-        self.термообработка_начало_первого_цикла = QLineEdit()
-        self.термообработка_начало_первого_цикла.setPlaceholderText("Начало (ЧЧ:ММ)")
-        self.термообработка_начало_первого_цикла.setMaxLength(5)
-        self.термообработка_начало_первого_цикла.textChanged.connect(self.format_time_input)
-        cycle1_layout.addWidget(self.термообработка_начало_первого_цикла)
-
-        self.термообработка_конец_первого_цикла = QLineEdit()
-        self.термообработка_конец_первого_цикла.setPlaceholderText("Конец (ЧЧ:ММ)")
-        self.термообработка_конец_первого_цикла.setMaxLength(5)
-        self.термообработка_конец_первого_цикла.textChanged.connect(self.format_time_input)
-        cycle1_layout.addWidget(self.термообработка_конец_первого_цикла)
-
-        cycles_layout.addWidget(cycle1_container)
-
-        # Второй цикл
-        cycle2_container = QWidget()
-        cycle2_layout = QVBoxLayout(cycle2_container)
-        cycle2_layout.setSpacing(2)
-        cycle2_layout.setContentsMargins(0, 0, 0, 0)
-
-        цикл2_label = QLabel("ВТОРОЙ ЦИКЛ")
-        цикл2_label.setAlignment(Qt.AlignCenter)
-        cycle2_layout.addWidget(цикл2_label)
-
-        self.термообработка_начало_второго_цикла = QLineEdit()
-        self.термообработка_начало_второго_цикла.setPlaceholderText("Начало (ЧЧ:ММ)")
-        self.термообработка_начало_второго_цикла.setMaxLength(5)
-        self.термообработка_начало_второго_цикла.textChanged.connect(self.format_time_input)
-        cycle2_layout.addWidget(self.термообработка_начало_второго_цикла)
-
-        self.термообработка_конец_второго_цикла = QLineEdit()
-        self.термообработка_конец_второго_цикла.setPlaceholderText("Конец (ЧЧ:ММ)")
-        self.термообработка_конец_второго_цикла.setMaxLength(5)
-        self.термообработка_конец_второго_цикла.textChanged.connect(self.format_time_input)
-        cycle2_layout.addWidget(self.термообработка_конец_второго_цикла)
-
-        cycles_layout.addWidget(cycle2_container)
-        right_layout.addWidget(cycles_container)
-
-        top_layout.addWidget(right_container)
-        layout.addWidget(top_container)
-
-        # Кнопка сохранения
-        self.save_button = QPushButton("СОХРАНИТЬ")
-        self.save_button.clicked.connect(self.save_data)
-        layout.addWidget(self.save_button)
-
-        self.setLayout(layout)
-        
-        # Инициализация полей плавок
-        self.update_plavka_fields('1')
-
-    def update_plavka_fields(self, печь_номер):
-        # Очищаем существующие поля
-        for field in self.plавка_fields:
-            self.plавка_layout.removeWidget(field)
-            field.deleteLater()
-        self.plавка_fields.clear()
-
-        # Определяем количество полей в зависимости от номера печи
-        количество_полей = 10 if печь_номер == '1' else 9
-        
-        # Получаем доступные плавки
-        доступные_плавки = get_available_plavki()
-        
-        # Создаем новые поля
-        for i in range(количество_полей):
-            combo = QComboBox()
-            combo.addItem(f"ПЛАВКА {i+1}")
-            combo.addItems(доступные_плавки)
-            self.plавка_fields.append(combo)
-            self.plавка_layout.addWidget(combo)
-
-    def format_time_input(self, text):
-        """Автоматически добавляет двоеточие после двух цифр"""
-        if len(text) == 2 and text.isdigit():
-            self.sender().setText(text + ":")
-            self.sender().setCursorPosition(3)  # Установка курсора после двоеточия
-
-    def validate_time(self, time_str):
-        """Проверка корректности ввода времени в формате ЧЧ:ММ"""
+        workbook = load_workbook(file_name, read_only=True)
         try:
-            hours, minutes = map(int, time_str.split(':'))
-            if 0 <= hours < 24 and 0 <= minutes < 60:
-                return True
-        except ValueError:
-            return False
-        return False
+            if "Records" in workbook.sheetnames:
+                sheet = workbook["Records"]
+                # Первый столбец содержит номер плавки
+                for (номер_плавки,) in sheet.iter_rows(min_row=2, max_col=1, values_only=True):
+                    if номер_плавки is not None:
+                        существующие_плавки.add(str(номер_плавки))
+        finally:
+            workbook.close()
+    return существующие_плавки
 
-    def save_data(self):
-        номер_печи = self.термообработка_номер_печи.currentText()
-        термообработка_дата = self.термообработка_дата.date().toString("dd.MM.yyyy")
-        начало_первого_цикла = self.термообработка_начало_первого_цикла.text().strip()
-        конец_первого_цикла = self.термообработка_конец_первого_цикла.text().strip()
-        начало_второго_цикла = self.термообработка_начало_второго_цикла.text().strip()
-        конец_второго_цикла = self.термообработка_конец_второго_цикла.text().strip()
-
-        # Проверка времени для первого цикла
-        if not self.validate_time(начало_первого_цикла) or not self.validate_time(конец_первого_цикла):
-            QMessageBox.warning(self, "Ошибка", "Некорректный ввод времени первого цикла. Используйте формат ЧЧ:ММ.")
+
+def файл_состояния_сканирования(file_name):
+    return file_name + '.scan.json'
+
+
+def _хэш_строки(row):
+    return hashlib.sha1(repr(нормализовать_запись(row)).encode('utf-8')).hexdigest()
+
+
+def _прочитать_состояние(file_name):
+    try:
+        with open(файл_состояния_сканирования(file_name), encoding='utf-8') as f:
+            состояние = json.load(f)
+        return {
+            'подпись': состояние.get('подпись'),
+            'строк': int(состояние['строк']),
+            'заголовок': list(состояние['заголовок']),
+            'хэш': str(состояние['хэш']),
+            'использованные': set(состояние['использованные']),
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _записать_кэш(путь, данные):
+    """Атомарно пишет служебный JSON рядом с книгой; сбой записи не фатален.
+
+    Такой файл - лишь кэш: если его не удалось записать, старый удаляется,
+    и книга в следующий раз будет прочитана целиком. Временный файл
+    уникален, чтобы станции не мешали друг другу.
+    """
+    временный_файл = None
+    try:
+        fd, временный_файл = tempfile.mkstemp(
+            prefix=os.path.basename(путь) + '.', suffix='.tmp',
+            dir=os.path.dirname(os.path.abspath(путь)))
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(данные, f, ensure_ascii=False)
+        os.replace(временный_файл, путь)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(путь)
+        if временный_файл is not None:
+            with contextlib.suppress(OSError):
+                os.remove(временный_файл)
+
+
+def _записать_состояние(file_name, состояние, подпись):
+    """Сохраняет файл состояния сканирования (см. _записать_кэш).
+
+    подпись - подпись журнала, взятая до чтения строк состояния: если
+    журнал дописали во время чтения, она не совпадет с файлом, и следующий
+    scan_used_plavki дочитает хвост, а не поверит неполному набору.
+    """
+    _записать_кэш(файл_состояния_сканирования(file_name), {
+        'подпись': подпись,
+        'строк': состояние['строк'],
+        'заголовок': состояние['заголовок'],
+        'хэш': состояние['хэш'],
+        'использованные': sorted(состояние['использованные']),
+    })
+
+
+class _ХвостЖурнала:
+    """Строки листа Records после водяного знака; см. хвост_журнала."""
+
+    def __init__(self, режим='full', строки=(), строк=1, последняя=None, заголовок=None):
+        self.режим = режим
+        self.прочитано = 0
+        self.знак = None
+        self._строки = строки
+        self._строк = строк
+        self._последняя = последняя
+        self._заголовок = заголовок
+
+    def __iter__(self):
+        номер_строки, последняя = self._строк, self._последняя
+        for row in self._строки:
+            номер_строки += 1
+            последняя = row
+            yield row
+        self.прочитано = номер_строки - self._строк
+        if self._заголовок is not None:
+            self.знак = {
+                'строк': номер_строки,
+                'заголовок': self._заголовок,
+                'хэш': _хэш_строки(последняя) if последняя is not None else '',
+            }
+
+
+@contextlib.contextmanager
+def хвост_журнала(file_name, знак=None):
+    """Строки листа Records после водяного знака.
+
+    Водяной знак - словарь со строк (номер последней прочитанной строки),
+    заголовок и хэш этой строки, как в файле состояния сканирования. Если
+    строк стало меньше, либо заголовок или строка на знаке изменились,
+    журнал правили вручную: строки идут с первой строки данных и режим
+    'full', иначе режим 'tail'. После прохода в .знак новый водяной знак
+    (None, если листа Records нет).
+    """
+    if not os.path.exists(file_name):
+        yield _ХвостЖурнала()
+        return
+    workbook = load_workbook(file_name, read_only=True)
+    try:
+        if "Records" not in workbook.sheetnames:
+            yield _ХвостЖурнала()
             return
+        sheet = workbook["Records"]
+        заголовок = [
+            нормализовать_запись(row)
+            for row in sheet.iter_rows(max_row=1, max_col=len(ЗАГОЛОВКИ), values_only=True)
+        ]
+        заголовок = list(заголовок[0]) if заголовок else []
 
-        # Проверка времени для второго цикла (если заполнено)
-        if (начало_второго_цикла or конец_второго_цикла):
-            if not self.validate_time(начало_второго_цикла) or not self.validate_time(конец_второго_цикла):
-                QMessageBox.warning(self, "Ошибка", "Некорректный ввод времени второго цикла. Используйте формат ЧЧ:ММ.")
+        if знак is not None and знак['заголовок'] == заголовок and знак['строк'] >= 1:
+            rows = sheet.iter_rows(min_row=знак['строк'], max_col=len(ЗАГОЛОВКИ), values_only=True)
+            первая = next(rows, None)
+            if первая is not None and (знак['строк'] == 1 or _хэш_строки(первая) == знак['хэш']):
+                yield _ХвостЖурнала('tail', rows, знак['строк'], первая, заголовок)
                 return
 
-        # Собираем выбранные плавки
-        выбранные_плавки = []
-        for combo in self.plавка_fields:
-            плавка = combo.currentText()
-            if плавка != f"ПЛАВКА {len(выбранные_плавки)+1}":
-                выбранные_плавки.append(плавка)
+        # Полный проход с первой строки данных
+        yield _ХвостЖурнала(
+            'full', sheet.iter_rows(min_row=2, max_col=len(ЗАГОЛОВКИ), values_only=True),
+            заголовок=заголовок)
+    finally:
+        workbook.close()
+
+
+def scan_used_plavki(file_name=ФАЙЛ_ЖУРНАЛА):
+    """Как get_used_plavki, но дочитывает только строки после водяного знака
+    (см. сканировать_журнал)."""
+    return сканировать_журнал(file_name)[0]
+
+
+@замеряется('excel.scan', 'file_name')
+def сканировать_журнал(file_name=ФАЙЛ_ЖУРНАЛА):
+    """Номера плавок журнала и водяной знак, до которого они прочитаны.
+
+    Журнал растет только добавлением, поэтому рядом с ним хранится файл
+    состояния: водяной знак хвост_журнала и накопленный набор номеров.
+    Если журнал правили вручную, набор строится заново полным проходом.
+
+    xlsx - это zip, и openpyxl все равно разбирает строки до водяного знака;
+    экономится их обработка, а при неизменной подписи файла (mtime, размер)
+    книга не открывается вовсе. Водяной знак (или None) позволяет потом
+    проверить по самой книге только строки после него.
+    """
+    if not os.path.exists(file_name):
+        return set(), None
+
+    поля = поля_замера()
+    состояние = _прочитать_состояние(file_name)
+    # Подпись берется до открытия книги: сканирование идет без блокировки
+    подпись = подпись_файла(file_name)
+    if состояние is not None and состояние['подпись'] is not None \
+            and tuple(состояние['подпись']) == подпись:
+        поля.update(mode='unchanged', rows=0)
+        return состояние['использованные'], {
+            ключ: состояние[ключ] for ключ in ('строк', 'заголовок', 'хэш')
+        }
+    with хвост_журнала(file_name, состояние) as хвост:
+        использованные = состояние['использованные'] if хвост.режим == 'tail' else set()
+        for row in хвост:
+            if row[0] is not None:
+                использованные.add(str(row[0]))  # Первый столбец содержит номер плавки
+
+    if хвост.знак is None:
+        return использованные, None
+    поля.update(mode=хвост.режим, rows=хвост.прочитано)
+    _записать_состояние(file_name, dict(хвост.знак, использованные=использованные), подпись)
+    return использованные, хвост.знак
+
+
+def advance_scan_state(file_name, records, последняя_строка):
+    """Сдвигает водяной знак после собственной записи, без чтения журнала.
+
+    Состояние сдвигается, только если оно заканчивалось ровно перед
+    дописанными строками; иначе хвост дочитает следующий scan_used_plavki.
+    Вызывается под блокировкой журнала сразу после записи, поэтому
+    текущая подпись файла относится именно к этим строкам.
+    """
+    состояние = _прочитать_состояние(file_name)
+    if состояние is None or состояние['строк'] != последняя_строка - len(records):
+        return False
+    состояние['строк'] = последняя_строка
+    состояние['хэш'] = _хэш_строки(records[-1])
+    состояние['использованные'].update(str(record[0]) for record in records)
+    _записать_состояние(file_name, состояние, подпись_файла(file_name))
+    return True
+
+
+def подпись_файла(file_name):
+    """(mtime, размер) файла или None, если файла нет."""
+    try:
+        st = os.stat(file_name)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class HeatIndex:
+    """Неизменяемый отсортированный список плавок с поиском по префиксу.
+
+    Сортировка выполняется один раз при построении; поиск - два bisect по
+    списку по возрастанию, то есть O(log n) плюс размер результата.
+    """
 
-        if not выбранные_плавки:
-            QMessageBox.warning(self, "Ошибка", "Выберите хотя бы одну плавку.")
+    def __init__(self, плавки=()):
+        self._по_возрастанию = sorted(set(плавки))
+        self._множество = frozenset(self._по_возрастанию)
+        # Форма показывает плавки по убыванию
+        self.по_убыванию = self._по_возрастанию[::-1]
+
+    def __len__(self):
+        return len(self._по_возрастанию)
+
+    def __contains__(self, плавка):
+        return плавка in self._множество
+
+    def найти(self, префикс, лимит=None, исключить=frozenset()):
+        """Плавки, начинающиеся с префикса, по убыванию."""
+        начало = bisect.bisect_left(self._по_возрастанию, префикс)
+        конец = bisect.bisect_left(self._по_возрастанию, префикс + '\U0010ffff', начало)
+        найдено = []
+        for i in range(конец - 1, начало - 1, -1):
+            плавка = self._по_возрастанию[i]
+            if плавка not in исключить:
+                найдено.append(плавка)
+                if лимит is not None and len(найдено) >= лимит:
+                    break
+        return найдено
+
+    def без(self, плавки):
+        """Новый индекс без указанных плавок; повторной сортировки нет."""
+        плавки = set(плавки)
+        индекс = HeatIndex.__new__(HeatIndex)
+        индекс._по_возрастанию = [п for п in self._по_возрастанию if п not in плавки]
+        индекс._множество = self._множество - плавки
+        индекс.по_убыванию = индекс._по_возрастанию[::-1]
+        return индекс
+
+
+class HeatCatalogue:
+    """Кэш номеров плавок из plavka.xlsx и журнала термообработки.
+
+    Книги перечитываются только когда меняется их подпись (mtime, размер);
+    между сеансами номера хранятся в файлах .heats.json и .scan.json.
+    После собственного сохранения записанные плавки добавляются в набор
+    использованных без повторного чтения журнала.
+    """
+
+    def __init__(self, файл_плавок=ФАЙЛ_ПЛАВОК, файл_журнала=ФАЙЛ_ЖУРНАЛА):
+        self.файл_плавок = файл_плавок
+        self.файл_журнала = файл_журнала
+        self._подписи = {}
+        self.все_плавки = []
+        self.использованные = set()
+        # Строка журнала, до которой прочитаны использованные (см. хвост_журнала)
+        self.знак_журнала = None
+        self._индекс = None
+        self._год = None
+
+    def обновить(self):
+        """Перечитывает изменившиеся источники. Возвращает True, если что-то перечитано."""
+        изменено = False
+        подпись = подпись_файла(self.файл_плавок)
+        if self.файл_плавок not in self._подписи or self._подписи[self.файл_плавок] != подпись:
+            self.все_плавки = load_existing_plavki(self.файл_плавок)
+            self._подписи[self.файл_плавок] = подпись
+            изменено = True
+
+        подпись = подпись_файла(self.файл_журнала)
+        if self.файл_журнала not in self._подписи or self._подписи[self.файл_журнала] != подпись:
+            self.использованные, self.знак_журнала = сканировать_журнал(self.файл_журнала)
+            self._подписи[self.файл_журнала] = подпись
+            изменено = True
+
+        if изменено:
+            self._индекс = None
+        return изменено
+
+    def индекс(self, проверить=True):
+        """HeatIndex доступных плавок.
+
+        Индекс (и его сортировка) строится заново только после перечитывания
+        источников. При проверить=False файлы не трогаются вовсе, если
+        каталог уже построен.
+        """
+        if проверить or self._индекс is None:
+            self.обновить()
+        год = активный_год()
+        if self._индекс is None or self._год != год:
+            # Фильтруем номера плавок, оставляя только те, которые отсутствуют в termoobrabotka.xlsx и имеют "/ГГ" доступного года
+            self._индекс = HeatIndex(
+                плавка for плавка in self.все_плавки
+                if плавка not in self.использованные and плавка_доступного_года(плавка, год)
+            )
+            self._год = год
+        return self._индекс
+
+    def доступные(self, проверить=True):
+        """Доступные плавки по убыванию."""
+        return self.индекс(проверить).по_убыванию
+
+    def занятые_в_книге(self, ws, плавки):
+        """Какие из плавок уже записаны в лист Records ws.
+
+        ws - уже загруженный для записи лист, поэтому проверка идет по
+        тому же содержимому, которое будет сохранено, и не зависит от
+        файла состояния других станций. Строки до водяного знака каталога
+        заменяет набор использованных, если строка на знаке не изменилась;
+        иначе просматривается весь первый столбец.
+        """
+        плавки = {str(плавка) for плавка in плавки}
+        начало = 2
+        занятые = set()
+        знак = self.знак_журнала
+        if знак is not None and 1 < знак['строк'] <= ws.max_row:
+            строка_знака = next(ws.iter_rows(min_row=знак['строк'], max_row=знак['строк'],
+                                             max_col=len(ЗАГОЛОВКИ), values_only=True))
+            if _хэш_строки(строка_знака) == знак['хэш']:
+                начало = знак['строк'] + 1
+                занятые = плавки & self.использованные
+        for (номер_плавки,) in ws.iter_rows(min_row=начало, max_col=1, values_only=True):
+            if номер_плавки is not None and str(номер_плавки) in плавки:
+                занятые.add(str(номер_плавки))
+        return занятые
+
+    def отметить_использованные(self, плавки, подпись_до_сохранения):
+        """Учитывает только что записанные плавки без перечитывания журнала.
+
+        подпись_до_сохранения - подпись журнала перед нашей записью. Если она
+        не совпадает с известной каталогу, файл менял кто-то еще, и журнал
+        будет перечитан при следующем обновлении. Возвращает True, если
+        каталог остался согласован с файлом.
+        """
+        плавки = set(плавки)
+        self.использованные |= плавки
+        if self._индекс is not None:
+            # Индекс мог уйти в форму - не меняем его на месте
+            self._индекс = self._индекс.без(плавки)
+        if self._подписи.get(self.файл_журнала) == подпись_до_сохранения:
+            self._подписи[self.файл_журнала] = подпись_файла(self.файл_журнала)
+            return True
+        return False
+
+
+def _дата_журнала(value):
+    """Дата в виде ДД.ММ.ГГГГ, как ее пишет форма."""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.strftime('%d.%m.%Y')
+    return '' if value is None else str(value)
+
+
+def _время_журнала(value):
+    """Время в виде ЧЧ:ММ; старые строки журнала хранят datetime.time."""
+    if isinstance(value, (datetime.time, datetime.datetime)):
+        return value.strftime('%H:%M')
+    return '' if value is None else str(value)
+
+
+def _дата_iso(дата):
+    """ДД.ММ.ГГГГ -> ГГГГ-ММ-ДД, чтобы индекс по дате сортировался верно."""
+    try:
+        return datetime.datetime.strptime(дата, '%d.%m.%Y').date().isoformat()
+    except ValueError:
+        return дата
+
+
+def нормализовать_запись(record):
+    """Приводит строку Records (любого года выпуска) к строковому виду формы."""
+    record = list(record) + [None] * (len(ЗАГОЛОВКИ) - len(record))
+    номер_плавки, номер_печи, дата = record[:3]
+    return (
+        '' if номер_плавки is None else str(номер_плавки),
+        '' if номер_печи is None else str(номер_печи),
+        _дата_журнала(дата),
+        *(_время_журнала(value) for value in record[3:len(ЗАГОЛОВКИ)])
+    )
+
+
+@замеряется('excel.read', 'file_name')
+def read_journal_records(file_name=ФАЙЛ_ЖУРНАЛА):
+    """Построчно читает лист Records, записи нормализованы."""
+    if not os.path.exists(file_name):
+        return
+    workbook = load_workbook(file_name, read_only=True)
+    try:
+        if "Records" not in workbook.sheetnames:
             return
+        sheet = workbook["Records"]
+        for row in sheet.iter_rows(min_row=2, max_col=len(ЗАГОЛОВКИ), values_only=True):
+            if row[0] is not None:
+                yield нормализовать_запись(row)
+    finally:
+        workbook.close()
+
+
+@замеряется('excel.export', 'file_name')
+def export_records_to_excel(records, file_name):
+    """Выгружает записи в новую книгу Records, подменяя файл целиком."""
+    from openpyxl.cell import WriteOnlyCell
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Records")
+    ws.append(ЗАГОЛОВКИ)
+    строк = 0
+    for record in records:
+        строк += 1
+        row = []
+        for col, value in enumerate(record, start=1):
+            cell = WriteOnlyCell(ws, value=value)
+            if col == 3:  # Колонка C (дата)
+                cell.number_format = 'DD.MM.YYYY'
+            elif col in [4, 5, 6, 7]:  # Колонки D, E, F, G (время)
+                cell.number_format = 'HH:MM'
+            row.append(cell)
+        ws.append(row)
+    поля_замера()['rows'] = строк
+    _сохранить_книгу(wb, file_name)
+
+
+def файл_архива(file_name, год):
+    """termoobrabotka.xlsx, 2024 -> termoobrabotka_2024.xlsx рядом с журналом."""
+    основа, расширение = os.path.splitext(file_name)
+    return f"{основа}_{год}{расширение}"
+
+
+def файлы_архива(file_name=ФАЙЛ_ЖУРНАЛА):
+    """Архивы журнала по возрастанию года."""
+    основа, расширение = os.path.splitext(file_name)
+    return sorted(glob.glob(f"{glob.escape(основа)}_[0-9][0-9][0-9][0-9]{glob.escape(расширение)}"))
 
+
+def _год_записи(record):
+    день = _день(record[2])
+    return None if день is None else datetime.date.fromordinal(день).year
+
+
+def нужен_перенос(file_name, год=None):
+    """Относится ли первая или последняя строка Records к закрытому году
+    (раньше всех доступных лет при активном годе год).
+
+    Журнал пишется по порядку дат, поэтому после смены года первая строка
+    оказывается прошлогодней; последняя - если запись прошлого года внесли
+    задним числом уже после переноса. Строки закрытых лет в середине листа
+    (ручная правка) так не находятся - их переносит команда archive.
+    """
+    if not os.path.exists(file_name):
+        return False
+    год = min(доступные_годы(год))
+
+    def закрытого_года(row):
+        год_записи = _год_записи(нормализовать_запись(row))
+        return год_записи is not None and год_записи < год
+
+    workbook = load_workbook(file_name, read_only=True)
+    try:
+        if "Records" not in workbook.sheetnames:
+            return False
+        sheet = workbook["Records"]
+        for row in sheet.iter_rows(min_row=2, max_col=len(ЗАГОЛОВКИ), values_only=True):
+            if row[0] is not None:
+                if закрытого_года(row):
+                    return True
+                break
+        последняя = sheet.max_row
+        if последняя and последняя > 2:
+            for row in sheet.iter_rows(min_row=последняя, max_row=последняя,
+                                       max_col=len(ЗАГОЛОВКИ), values_only=True):
+                return row[0] is not None and закрытого_года(row)
+    finally:
+        workbook.close()
+    return False
+
+
+@замеряется('excel.archive', 'file_name')
+def archive_closed_years(file_name=ФАЙЛ_ЖУРНАЛА, год=None):
+    """Переносит строки закрытых лет из Records в termoobrabotka_<год>.xlsx.
+
+    год - активный год. Год строки - год ее даты; строки доступных лет
+    (доступные_годы: плавки прошлого года еще могут обрабатываться, и
+    журнал должен их помнить) и позже, а также с неразборчивой датой
+    остаются в журнале. Сначала дописываются архивы, затем журнал
+    атомарно переписывается без перенесенных строк; строки, уже попавшие
+    в архив при прерванном переносе, второй раз не пишутся. Остальные
+    листы книги и оформление листа Records сохраняются. Возвращает
+    {год: перенесено строк}.
+    """
+    год = min(доступные_годы(год))
+    if not os.path.exists(file_name):
+        return {}
+    wb = load_workbook(file_name)
+    try:
+        if "Records" not in wb.sheetnames:
+            return {}
+        ws = wb["Records"]
+        остаются = []
+        по_годам = {}
+        for row in ws.iter_rows(min_row=2, max_col=len(ЗАГОЛОВКИ), values_only=True):
+            if all(value is None for value in row):
+                continue
+            запись = нормализовать_запись(row)
+            год_записи = _год_записи(запись)
+            if год_записи is not None and год_записи < год:
+                по_годам.setdefault(год_записи, []).append(запись)
+            else:
+                остаются.append(row)
+        if not по_годам:
+            return {}
+
+        for год_архива, записи in sorted(по_годам.items()):
+            архив = файл_архива(file_name, год_архива)
+            уже_в_архиве = set(read_journal_records(архив))
+            новые = [запись for запись in записи if запись not in уже_в_архиве]
+            if новые:
+                save_records_to_excel(новые, архив)
+
+        # Оставшиеся строки переписываются на место, а хвост удаляется одним
+        # вызовом (по одной строке удаление в openpyxl квадратично). Лист не
+        # пересоздается: ширины столбцов, фильтр, закрепленные области и
+        # оформление заголовка остаются
+        строк_было = ws.max_row
+        _записать_строки(ws, остаются, 2)
+        последняя = len(остаются) + 1
+        if строк_было > последняя:
+            ws.delete_rows(последняя + 1, строк_было - последняя)
+        if ws.auto_filter.ref:
+            from openpyxl.utils import get_column_letter, range_boundaries
+            первый_столбец, первая_строка, последний_столбец, _ = range_boundaries(ws.auto_filter.ref)
+            ws.auto_filter.ref = (f"{get_column_letter(первый_столбец)}{первая_строка}:"
+                                  f"{get_column_letter(последний_столбец)}{max(последняя, первая_строка)}")
+        _сохранить_книгу(wb, file_name)
+    finally:
+        wb.close()
+    поля_замера()['rows'] = sum(len(записи) for записи in по_годам.values())
+    return {год_архива: len(записи) for год_архива, записи in по_годам.items()}
+
+
+def файл_блокировки(file_name):
+    return file_name + '.lock'
+
+
+def _снять_устаревшую(путь, чужая, устаревшая):
+    """Удаляет устаревшую блокировку, не задев свежую.
+
+    Файл сначала атомарно переименовывается в уникальное имя и только
+    потом сверяется: после переименования его уже никто не подменит. Если
+    под ним оказалась свежая блокировка (старую успела снять и взять
+    другая станция), она возвращается на место без перезаписи.
+    """
+    снятая = f"{путь}.{os.urandom(4).hex()}.stale"
+    try:
+        os.rename(путь, снятая)
+    except OSError:
+        return  # Уже сняли или освободили
+    try:
+        with open(снятая, encoding='utf-8') as f:
+            та_же = f.read() == чужая
+        if not та_же or time.time() - os.stat(снятая).st_mtime <= устаревшая:
+            try:
+                os.link(снятая, путь)
+            except FileExistsError:
+                pass  # Место уже заняла следующая станция
+            except OSError:
+                # Файловая система без жестких ссылок
+                if not os.path.exists(путь):
+                    with contextlib.suppress(OSError):
+                        os.rename(снятая, путь)
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(снятая)
+
+
+@contextlib.contextmanager
+def блокировка_файла(file_name, таймаут=None, устаревшая=None):
+    """Рекомендательная блокировка журнала для нескольких станций.
+
+    Блокировка - файл <журнал>.lock, созданный с O_EXCL: такое создание
+    атомарно и на сетевом диске, в отличие от fcntl/msvcrt. Пока файл
+    занят, попытки повторяются с экспоненциальной задержкой (0.05 с,
+    удвоение до 1 с, случайный разброс), после таймаут секунд
+    (TERMO_LOCK_TIMEOUT, по умолчанию 30) - исключение. Файл старше
+    устаревшая секунд (TERMO_LOCK_STALE, по умолчанию 120) остался от
+    упавшей станции и удаляется; пока блокировка удерживается, фоновый
+    поток обновляет время изменения файла, так что долгий перенос в архив
+    или большое сохранение устаревшими не считаются. В одном потоке
+    блокировка повторно входима.
+    """
+    if таймаут is None:
+        таймаут = float(os.environ.get('TERMO_LOCK_TIMEOUT', 30))
+    if устаревшая is None:
+        устаревшая = float(os.environ.get('TERMO_LOCK_STALE', 120))
+    путь = файл_блокировки(os.path.abspath(file_name))
+    удерживаемые = _поток.__dict__.setdefault('блокировки', set())
+    if путь in удерживаемые:
+        yield
+        return
+
+    метка = json.dumps({'host': socket.gethostname(), 'pid': os.getpid(),
+                        'token': os.urandom(8).hex(), 'time': time.time()})
+    with замер('lock', file=file_name) as поля:
+        срок = time.monotonic() + таймаут
+        задержка = 0.05
+        попыток = 0
+        while True:
+            попыток += 1
+            try:
+                fd = os.open(путь, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                pass
+            else:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(метка)
+                break
+            try:
+                with open(путь, encoding='utf-8') as f:
+                    чужая = f.read()
+                возраст = time.time() - os.stat(путь).st_mtime
+            except FileNotFoundError:
+                continue  # Освободили между попытками
+            if возраст > устаревшая:
+                _снять_устаревшую(путь, чужая, устаревшая)
+                continue
+            if time.monotonic() + задержка > срок:
+                поля['attempts'] = попыток
+                try:
+                    владелец = json.loads(чужая)
+                    владелец = f"{владелец['host']} (pid {владелец['pid']})"
+                except (ValueError, KeyError, TypeError):
+                    владелец = "другой станцией"
+                raise Exception(f"Журнал {file_name} занят: {владелец}. Повторите сохранение позже.")
+            time.sleep(задержка * random.uniform(0.5, 1.5))
+            задержка = min(задержка * 2, 1.0)
+        поля['attempts'] = попыток
+
+    def продлевать():
+        while not стоп.wait(устаревшая / 4):
+            with contextlib.suppress(OSError):
+                with open(путь, encoding='utf-8') as f:
+                    своя = f.read() == метка
+                if своя:
+                    os.utime(путь)
+
+    стоп = threading.Event()
+    пульс = threading.Thread(target=продлевать, name='termo-lock', daemon=True)
+    пульс.start()
+    удерживаемые.add(путь)
+    try:
+        yield
+    finally:
+        удерживаемые.discard(путь)
+        стоп.set()
+        пульс.join()
+        # Удаляем только свою блокировку: чужую могли взять после нашей устаревшей
+        with contextlib.suppress(OSError):
+            with open(путь, encoding='utf-8') as f:
+                своя = f.read() == метка
+            if своя:
+                os.remove(путь)
+
+
+class ExcelStorage:
+    """Журнал в termoobrabotka.xlsx, плавки из plavka.xlsx."""
+
+    def __init__(self, файл_журнала=ФАЙЛ_ЖУРНАЛА, файл_плавок=ФАЙЛ_ПЛАВОК):
+        self.файл_журнала = файл_журнала
+        self.каталог = HeatCatalogue(файл_плавок, файл_журнала)
+        self._циклы = None
+        self._подпись_циклов = None
+        self._знак_циклов = None
+        self._проверен_год = None
+
+    def lock(self):
+        return блокировка_файла(self.файл_журнала)
+
+    def append(self, records):
+        records = [tuple(record) for record in records]
+        if not records:
+            return
+        with self.lock():
+            self.archive_if_needed()
+            # Журнал могла дописать другая станция: ее строки дочитываются
+            # и плавки проверяются заново уже под блокировкой
+            self.каталог.обновить()
+            занятые = {str(record[0]) for record in records} & self.каталог.использованные
+            if занятые:
+                raise Exception(f"Плавки уже есть в журнале: {', '.join(sorted(занятые))}")
+
+            def проверка(ws):
+                # Каталог мог поверить файлу состояния, записанному другой
+                # станцией; решает содержимое самой книги после водяного знака
+                занятые = self.каталог.занятые_в_книге(ws, [record[0] for record in records])
+                if занятые:
+                    raise Exception(f"Плавки уже есть в журнале: {', '.join(sorted(занятые))}")
+
+            подпись_до_сохранения = подпись_файла(self.файл_журнала)
+            последняя_строка = save_records_to_excel(records, self.файл_журнала, проверка)
+            if self.каталог.отметить_использованные(
+                [record[0] for record in records], подпись_до_сохранения
+            ):
+                знак = self.каталог.знак_журнала
+                if знак is not None and знак['строк'] == последняя_строка - len(records):
+                    self.каталог.знак_журнала = dict(знак, строк=последняя_строка, хэш=_хэш_строки(records[-1]))
+                advance_scan_state(self.файл_журнала, records, последняя_строка)
+            if self._циклы is not None and self._подпись_циклов == подпись_до_сохранения:
+                self._циклы.добавить({цикл for record in records for цикл in циклы_записи(record)})
+                self._подпись_циклов = подпись_файла(self.файл_журнала)
+                знак = self._знак_циклов
+                if знак is not None and знак['строк'] == последняя_строка - len(records):
+                    self._знак_циклов = dict(знак, строк=последняя_строка, хэш=_хэш_строки(records[-1]))
+                else:
+                    self._знак_циклов = None
+
+    def archive_if_needed(self):
+        """Раз за сеанс (и при смене года) уносит закрытые годы в архивы.
+
+        Так сохранение и чтение журнала стоят не больше одного года строк.
+        """
+        год = активный_год()
+        if self._проверен_год == год:
+            return {}
+        with self.lock():
+            перенесено = archive_closed_years(self.файл_журнала, год) \
+                if нужен_перенос(self.файл_журнала, год) else {}
+        self._проверен_год = год
+        return перенесено
+
+    def cycle_index(self):
+        """CycleIndex журнала.
+
+        Если файл дописала другая станция, дочитываются только строки после
+        водяного знака индекса; весь журнал - при первом обращении и после
+        ручной правки или переноса в архив.
+        """
+        подпись = подпись_файла(self.файл_журнала)
+        if self._циклы is not None and self._подпись_циклов == подпись:
+            return self._циклы
+        знак = self._знак_циклов if self._циклы is not None else None
+        with замер('cycles.build', file=self.файл_журнала) as поля:
+            with хвост_журнала(self.файл_журнала, знак) as хвост:
+                записи = (нормализовать_запись(row) for row in хвост if row[0] is not None)
+                if хвост.режим == 'tail':
+                    self._циклы.добавить({цикл for record in записи for цикл in циклы_записи(record)})
+                else:
+                    self._циклы = CycleIndex.из_записей(записи)
+            поля.update(mode=хвост.режим, rows=хвост.прочитано)
+        self._знак_циклов = хвост.знак
+        self._подпись_циклов = подпись
+        return self._циклы
+
+    def conflicts(self, циклы):
+        индекс = self.cycle_index()
+        return [конфликт for цикл in циклы for конфликт in индекс.пересечения(*цикл)]
+
+    def available_plavki(self, проверить=True):
+        return list(self.каталог.доступные(проверить))
+
+    def known_plavki(self):
+        self.каталог.обновить()
+        return set(self.каталог.все_плавки)
+
+    def heat_index(self, проверить=True):
+        return self.каталог.индекс(проверить)
+
+    def records(self):
+        return read_journal_records(self.файл_журнала)
+
+    def all_records(self):
+        """Архивы закрытых лет по порядку, затем сам журнал."""
+        for архив in файлы_архива(self.файл_журнала):
+            yield from read_journal_records(архив)
+        yield from self.records()
+
+
+class SQLiteStorage:
+    """Журнал во встроенной базе SQLite (режим WAL).
+
+    Добавление записи - одна вставка в транзакции, проверка "плавка уже
+    обработана" идет по индексу. termoobrabotka.xlsx становится выгрузкой:
+    по запросу (export_to_excel) или не чаще раза в интервал_экспорта секунд.
+    Список плавок копируется из plavka.xlsx, когда тот меняется.
+    """
+
+    def __init__(self, файл_базы=ФАЙЛ_БАЗЫ, файл_плавок=ФАЙЛ_ПЛАВОК,
+                 файл_журнала=ФАЙЛ_ЖУРНАЛА, интервал_экспорта=None):
+        self.файл_базы = файл_базы
+        self.файл_плавок = файл_плавок
+        self.файл_журнала = файл_журнала
+        self.интервал_экспорта = интервал_экспорта
+        self._циклы = None
+        self._последний_id = 0
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS records (
+                    id INTEGER PRIMARY KEY,
+                    номер_плавки TEXT NOT NULL,
+                    номер_печи TEXT NOT NULL,
+                    дата TEXT NOT NULL,
+                    начало_первого_цикла TEXT NOT NULL,
+                    конец_первого_цикла TEXT NOT NULL,
+                    начало_второго_цикла TEXT NOT NULL DEFAULT '',
+                    конец_второго_цикла TEXT NOT NULL DEFAULT ''
+                );
+                CREATE INDEX IF NOT EXISTS records_плавка ON records (номер_плавки);
+                CREATE INDEX IF NOT EXISTS records_печь_дата ON records (номер_печи, дата);
+                CREATE INDEX IF NOT EXISTS records_дата ON records (дата);
+                CREATE TABLE IF NOT EXISTS plavki (номер TEXT PRIMARY KEY);
+                CREATE TABLE IF NOT EXISTS meta (ключ TEXT PRIMARY KEY, значение TEXT);
+            """)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # Соединение на вызов: хранилище используется и из фонового потока
+        conn = sqlite3.connect(self.файл_базы, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _meta(self, conn, ключ):
+        row = conn.execute("SELECT значение FROM meta WHERE ключ = ?", (ключ,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, conn, ключ, значение):
+        conn.execute("INSERT OR REPLACE INTO meta (ключ, значение) VALUES (?, ?)", (ключ, значение))
+
+    def sync_plavki(self):
+        """Перечитывает plavka.xlsx, если он изменился с прошлого раза."""
+        подпись = repr(подпись_файла(self.файл_плавок))
+        with self._connect() as conn:
+            if self._meta(conn, 'подпись_плавок') == подпись:
+                return False
+        плавки = get_existing_plavki(self.файл_плавок)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM plavki")
+            conn.executemany("INSERT OR IGNORE INTO plavki (номер) VALUES (?)",
+                             ((плавка,) for плавка in плавки))
+            self._set_meta(conn, 'подпись_плавок', подпись)
+        return True
+
+    def lock(self):
+        return блокировка_файла(self.файл_базы)
+
+    @замеряется('sqlite.append')
+    def append(self, records):
+        строки = []
+        for record in records:
+            record = нормализовать_запись(record)
+            строки.append(record[:2] + (_дата_iso(record[2]),) + record[3:])
+        поля_замера()['rows'] = len(строки)
+        with self._connect() as conn:
+            # Проверка и вставка в одной транзакции с блокировкой записи
+            conn.execute("BEGIN IMMEDIATE")
+            занятые = sorted({
+                строка[0] for строка in строки
+                if conn.execute("SELECT 1 FROM records WHERE номер_плавки = ? LIMIT 1", (строка[0],)).fetchone()
+            })
+            if занятые:
+                raise Exception(f"Плавки уже есть в журнале: {', '.join(занятые)}")
+            conn.executemany(
+                "INSERT INTO records (номер_плавки, номер_печи, дата, "
+                "начало_первого_цикла, конец_первого_цикла, "
+                "начало_второго_цикла, конец_второго_цикла) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                строки
+            )
+        if self.интервал_экспорта:
+            with self._connect() as conn:
+                последний_экспорт = float(self._meta(conn, 'последний_экспорт') or 0)
+            if time.time() - последний_экспорт >= self.интервал_экспорта:
+                self.export_to_excel()
+
+    @замеряется('sqlite.available')
+    def available_plavki(self, проверить=True):
+        if проверить:
+            self.sync_plavki()
+        фильтры = [фильтр_года(год) for год in доступные_годы()]
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT номер FROM plavki WHERE ("
+                + " OR ".join(["instr(номер, ?) > 0"] * len(фильтры)) + ") "
+                "AND NOT EXISTS (SELECT 1 FROM records WHERE номер_плавки = plavki.номер) "
+                "ORDER BY номер DESC",
+                фильтры
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def heat_index(self, проверить=True):
+        return HeatIndex(self.available_plavki(проверить))
+
+    @замеряется('sqlite.conflicts')
+    def conflicts(self, циклы):
+        """Пересечения по индексу (номер_печи, дата).
+
+        Загрузка укладывается в сутки (validate_cycles), поэтому цикл может
+        пересечься только с загрузками за день до дня его начала, в тот же
+        день и на следующий.
+        """
+        найдено = []
+        with self._connect() as conn:
+            for печь, начало, длительность in циклы:
+                день = начало // МИНУТ_В_СУТКАХ
+                rows = conn.execute(
+                    "SELECT номер_плавки, номер_печи, дата, "
+                    "начало_первого_цикла, конец_первого_цикла, "
+                    "начало_второго_цикла, конец_второго_цикла "
+                    "FROM records WHERE номер_печи = ? AND дата BETWEEN ? AND ?",
+                    (печь, datetime.date.fromordinal(день - 1).isoformat(),
+                     datetime.date.fromordinal(день + 1).isoformat())
+                ).fetchall()
+                найдено.extend(CycleIndex.из_записей(rows).пересечения(печь, начало, длительность))
+        return найдено
+
+    def cycle_index(self):
+        """CycleIndex всей базы за один запрос, дальше - только новые строки.
+
+        Нужен пакетным проверкам (импорт CSV): запрос на каждую строку
+        стоил бы соединения и строки журнала замеров. Записи в базе только
+        добавляются, поэтому водяной знак - наибольший id; если он
+        уменьшился, базу пересоздали, и индекс строится заново.
+        """
+        with замер('cycles.build', file=self.файл_базы) as поля, self._connect() as conn:
+            (последний_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM records").fetchone()
+            полностью = self._циклы is None or последний_id < self._последний_id
+            if полностью:
+                self._последний_id = 0
+            поля['mode'] = 'full' if полностью else 'tail'
+            rows = conn.execute(
+                "SELECT номер_плавки, номер_печи, дата, "
+                "начало_первого_цикла, конец_первого_цикла, "
+                "начало_второго_цикла, конец_второго_цикла "
+                "FROM records WHERE id > ? AND id <= ? ORDER BY id",
+                (self._последний_id, последний_id)
+            ).fetchall()
+            поля['rows'] = len(rows)
+        if полностью:
+            self._циклы = CycleIndex.из_записей(rows)
+        else:
+            self._циклы.добавить({цикл for record in rows for цикл in циклы_записи(record)})
+        self._последний_id = последний_id
+        return self._циклы
+
+    def known_plavki(self):
+        self.sync_plavki()
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT номер FROM plavki")}
+
+    def records(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT номер_плавки, номер_печи, дата, "
+                "начало_первого_цикла, конец_первого_цикла, "
+                "начало_второго_цикла, конец_второго_цикла "
+                "FROM records ORDER BY id"
+            ).fetchall()
+        for row in rows:
+            дата = row[2]
+            try:
+                дата = datetime.date.fromisoformat(дата).strftime('%d.%m.%Y')
+            except ValueError:
+                pass
+            yield row[:2] + (дата,) + row[3:]
+
+    def all_records(self):
+        # В базе архивов нет: год выбирается индексом по дате
+        return self.records()
+
+    def export_to_excel(self, file_name=None):
+        export_records_to_excel(self.records(), file_name or self.файл_журнала)
+        with self._connect() as conn:
+            self._set_meta(conn, 'последний_экспорт', str(time.time()))
+
+    def import_from_excel(self, файл_журнала=None):
+        """Разовый перенос журнала и плавок из xlsx. Возвращает число записей."""
+        self.sync_plavki()
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM records LIMIT 1").fetchone():
+                raise Exception(f"База {self.файл_базы} уже содержит записи журнала")
+        файл_журнала = файл_журнала or self.файл_журнала
+        records = [
+            record
+            for file_name in файлы_архива(файл_журнала) + [файл_журнала]
+            for record in read_journal_records(file_name)
+        ]
+        self.append(records)
+        return len(records)
+
+
+_хранилище = None
+
+
+def get_storage():
+    """Хранилище журнала; выбирается переменной окружения TERMO_STORAGE.
+
+    excel (по умолчанию) - termoobrabotka.xlsx, sqlite - termoobrabotka.db
+    с выгрузкой в xlsx раз в TERMO_EXPORT_INTERVAL секунд (0 - только по запросу).
+    """
+    global _хранилище
+    if _хранилище is None:
+        if os.environ.get('TERMO_STORAGE', 'excel') == 'sqlite':
+            _хранилище = SQLiteStorage(
+                интервал_экспорта=float(os.environ.get('TERMO_EXPORT_INTERVAL', 0))
+            )
+        else:
+            _хранилище = ExcelStorage()
+    return _хранилище
+
+
+@замеряется('save')
+def save_records(records):
+    """Пакетная запись в журнал выбранного хранилища.
+
+    Ничего не пишется, если циклы загрузки пересекаются с уже записанными
+    циклами той же печи или плавку уже записала другая станция.
+    """
+    records = [tuple(record) for record in records]
+    поля_замера()['rows'] = len(records)
+    хранилище = get_storage()
+    # Проверка и запись под одной блокировкой: между ними другая станция
+    # не сможет занять ту же печь
+    with хранилище.lock():
+        конфликты = хранилище.conflicts({цикл for record in records for цикл in циклы_записи(record)})
+        if конфликты:
+            raise Exception("Печь уже занята в это время: " + "; ".join(
+                описать_цикл(цикл) for цикл in sorted(set(конфликты), key=lambda цикл: цикл[1])
+            ))
+        хранилище.append(records)
+
+
+def validate_time(time_str):
+    """Проверка корректности ввода времени в формате ЧЧ:ММ"""
+    try:
+        hours, minutes = map(int, time_str.split(':'))
+        if 0 <= hours < 24 and 0 <= minutes < 60:
+            return True
+    except ValueError:
+        return False
+    return False
+
+
+def validate_cycles(начало_первого_цикла, конец_первого_цикла,
+                    начало_второго_цикла="", конец_второго_цикла=""):
+    """Текст ошибки во времени циклов или None, если все верно.
+
+    Конец раньше начала означает переход через полночь, поэтому вся
+    загрузка (от начала первого цикла до конца второго) должна уложиться
+    в сутки - иначе второй цикл начинается раньше конца первого.
+    """
+    # Проверка времени для первого цикла
+    if not validate_time(начало_первого_цикла) or not validate_time(конец_первого_цикла):
+        return "Некорректный ввод времени первого цикла. Используйте формат ЧЧ:ММ."
+    начало1 = _минуты_времени(начало_первого_цикла)
+    конец1 = _минуты_времени(конец_первого_цикла)
+    if начало1 == конец1:
+        return "Конец первого цикла совпадает с началом."
+
+    # Проверка времени для второго цикла (если заполнено)
+    if (начало_второго_цикла or конец_второго_цикла):
+        if not validate_time(начало_второго_цикла) or not validate_time(конец_второго_цикла):
+            return "Некорректный ввод времени второго цикла. Используйте формат ЧЧ:ММ."
+        начало2 = _минуты_времени(начало_второго_цикла)
+        конец2 = _минуты_времени(конец_второго_цикла)
+        if начало2 == конец2:
+            return "Конец второго цикла совпадает с началом."
+        длительность = ((конец1 - начало1) % МИНУТ_В_СУТКАХ + (начало2 - конец1) % МИНУТ_В_СУТКАХ
+                        + (конец2 - начало2) % МИНУТ_В_СУТКАХ)
+        if длительность >= МИНУТ_В_СУТКАХ:
+            return "Второй цикл начинается раньше конца первого или загрузка длится больше суток."
+    return None
+
+
+def _минуты_времени(значение):
+    """ЧЧ:ММ -> минуты от полуночи или None."""
+    if not значение or not validate_time(значение):
+        return None
+    часы, минуты = map(int, значение.split(':'))
+    return часы * 60 + минуты
+
+
+@functools.lru_cache(maxsize=None)
+def _день(дата):
+    """Номер дня (date.toordinal) для ДД.ММ.ГГГГ или ГГГГ-ММ-ДД (так дата
+    хранится в базе); None для неверной даты. Дат в журнале немного, разбор
+    каждой кэшируется.
+    """
+    for формат in ('%d.%m.%Y', '%Y-%m-%d'):
+        try:
+            return datetime.datetime.strptime(дата, формат).toordinal()
+        except ValueError:
+            pass
+    return None
+
+
+def циклы_записи(record):
+    """Циклы записи журнала: (печь, начало в минутах от 01.01.0001, длительность).
+
+    Правила те же, что в journal_cycles: конец раньше начала - переход
+    через полночь, второй цикл начинается после конца первого. Запись без
+    даты или с неверным временем первого цикла циклов не дает.
+    """
+    _, печь, дата, *времена = нормализовать_запись(record)
+    день = _день(дата)
+    начало1, конец1, начало2, конец2 = (_минуты_времени(значение) for значение in времена)
+    if день is None or начало1 is None or конец1 is None:
+        return []
+    старт1 = день * МИНУТ_В_СУТКАХ + начало1
+    длительность1 = (конец1 - начало1) % МИНУТ_В_СУТКАХ
+    циклы = [(печь, старт1, длительность1)]
+    if начало2 is not None and конец2 is not None:
+        старт2 = старт1 + длительность1 + (начало2 - конец1) % МИНУТ_В_СУТКАХ
+        циклы.append((печь, старт2, (конец2 - начало2) % МИНУТ_В_СУТКАХ))
+    return циклы
+
+
+def описать_цикл(цикл):
+    """Цикл в виде "печь 2, 18.10.2026 23:30 - 19.10.2026 07:40"."""
+    печь, начало, длительность = цикл
+
+    def момент(минуты):
+        return (datetime.datetime.fromordinal(минуты // МИНУТ_В_СУТКАХ)
+                + datetime.timedelta(minutes=минуты % МИНУТ_В_СУТКАХ))
+
+    с, по = момент(начало), момент(начало + длительность)
+    if с.date() == по.date():
+        return f"печь {печь}, {с:%d.%m.%Y %H:%M} - {по:%H:%M}"
+    return f"печь {печь}, {с:%d.%m.%Y %H:%M} - {по:%d.%m.%Y %H:%M}"
+
+
+class CycleIndex:
+    """Циклы печей, отсортированные по началу, с проверкой пересечений.
+
+    Для каждой печи хранятся списки начал и концов, упорядоченные по
+    началу, и самая большая длительность цикла. Пересечь новый цикл могут
+    только циклы, начавшиеся не раньше чем за эту длительность до его
+    начала и до его конца: диапазон находится двумя bisect, то есть
+    O(log n) плюс число циклов в диапазоне (цикл короче суток, так что
+    их единицы). Одинаковые циклы - это плавки одной загрузки, и
+    пересечением они не считаются.
+    """
+
+    def __init__(self, циклы=()):
+        self._начала = {}
+        self._концы = {}
+        self._макс = {}
+        по_печам = {}
+        for печь, начало, длительность in set(циклы):
+            по_печам.setdefault(печь, []).append((начало, начало + длительность))
+        for печь, интервалы in по_печам.items():
+            интервалы.sort()
+            self._начала[печь] = [начало for начало, _ in интервалы]
+            self._концы[печь] = [конец for _, конец in интервалы]
+            self._макс[печь] = max(конец - начало for начало, конец in интервалы)
+
+    @classmethod
+    def из_записей(cls, records):
+        def циклы():
+            # Плавки одной загрузки идут подряд с одинаковыми временами -
+            # циклы разбираются один раз на загрузку
+            прошлая = None
+            for record in records:
+                загрузка = tuple(record[1:len(ЗАГОЛОВКИ)])
+                if загрузка != прошлая:
+                    прошлая = загрузка
+                    yield from циклы_записи(record)
+        return cls(циклы())
+
+    def __len__(self):
+        return sum(len(начала) for начала in self._начала.values())
+
+    def добавить(self, циклы):
+        """Добавляет циклы на место по порядку; журнал не перечитывается."""
+        for печь, начало, длительность in циклы:
+            начала = self._начала.setdefault(печь, [])
+            концы = self._концы.setdefault(печь, [])
+            # Новые загрузки обычно позже всех, тогда вставка - это append
+            i = bisect.bisect_left(начала, начало)
+            j = i
+            while j < len(начала) and начала[j] == начало and концы[j] != начало + длительность:
+                j += 1
+            if j < len(начала) and начала[j] == начало:
+                continue  # такой цикл уже есть
+            начала.insert(i, начало)
+            концы.insert(i, начало + длительность)
+            self._макс[печь] = max(self._макс.get(печь, 0), длительность)
+
+    def пересечения(self, печь, начало, длительность):
+        """Циклы печи, пересекающиеся с [начало, начало + длительность)."""
+        начала = self._начала.get(печь)
+        if not начала:
+            return []
+        конец = начало + длительность
+        концы = self._концы[печь]
+        с = bisect.bisect_right(начала, начало - self._макс[печь])
+        по = bisect.bisect_left(начала, конец, с)
+        return [
+            (печь, начала[i], концы[i] - начала[i])
+            for i in range(с, по)
+            if концы[i] > начало and not (начала[i] == начало and концы[i] == конец)
+        ]
+
+
+def _строки_csv(file_name, encoding):
+    """Потоково читает CSV, разделитель (; , или табуляция) определяется по началу файла."""
+    with open(file_name, newline='', encoding=encoding) as f:
+        образец = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            диалект = csv.Sniffer().sniff(образец, delimiters=';,\t')
+        except csv.Error:
+            диалект = csv.excel
+        yield from enumerate(csv.reader(f, диалект), start=1)
+
+
+@замеряется('import.csv', 'file_name')
+def import_records_from_csv(file_name, отчет, encoding='utf-8-sig', dry_run=False, strict=False):
+    """Проверяет строки CSV и дописывает принятые в журнал одной записью.
+
+    Столбцы - как в листе Records (ЗАГОЛОВКИ), строка заголовков
+    необязательна. Отклоненные строки пишутся в отчет (открытый текстовый
+    файл) по одной JSON-строке: номер строки, код причины, сообщение и
+    исходные значения. При strict=True журнал не меняется, если отклонена
+    хотя бы одна строка. Возвращает (принято, отклонено).
+    """
+    хранилище = get_storage()
+    принятые = []
+    плавки_в_файле = set()
+    циклы_в_файле = CycleIndex()
+    отклонено = 0
+
+    def отклонить(номер_строки, код, сообщение, row):
+        nonlocal отклонено
+        отклонено += 1
+        отчет.write(json.dumps({
+            'line': номер_строки, 'reason': код, 'message': сообщение, 'row': row
+        }, ensure_ascii=False) + '\n')
+
+    индекс = хранилище.heat_index()
+    известные = хранилище.known_plavki()
+    # Индекс циклов хранилища берется один раз, а не запросом на строку
+    циклы_хранилища = хранилище.cycle_index()
+    for номер_строки, row in _строки_csv(file_name, encoding):
+        row = [value.strip() for value in row]
+        if not any(row):
+            continue
+        if номер_строки == 1 and row[0].lower() == ЗАГОЛОВКИ[0].lower():
+            continue
+        if not 5 <= len(row) <= len(ЗАГОЛОВКИ):
+            отклонить(номер_строки, 'bad_columns', f"Ожидается от 5 до {len(ЗАГОЛОВКИ)} столбцов", row)
+            continue
+        row = row + [''] * (len(ЗАГОЛОВКИ) - len(row))
+        плавка, номер_печи, дата = row[:3]
+
+        if номер_печи not in ('1', '2'):
+            отклонить(номер_строки, 'bad_furnace', "Номер печи должен быть 1 или 2", row)
+            continue
+        try:
+            datetime.datetime.strptime(дата, '%d.%m.%Y')
+        except ValueError:
+            отклонить(номер_строки, 'bad_date', "Некорректная дата. Используйте формат ДД.ММ.ГГГГ.", row)
+            continue
+        ошибка = validate_cycles(*row[3:])
+        if ошибка:
+            отклонить(номер_строки, 'bad_time', ошибка, row)
+            continue
+        if плавка not in известные:
+            отклонить(номер_строки, 'unknown_heat', f"Плавки {плавка} нет в {ФАЙЛ_ПЛАВОК}", row)
+            continue
+        if плавка in плавки_в_файле:
+            отклонить(номер_строки, 'duplicate_in_file', f"Плавка {плавка} уже встречалась в файле", row)
+            continue
+        if плавка not in индекс:
+            if not плавка_доступного_года(плавка):
+                отклонить(номер_строки, 'wrong_year', f"Плавка {плавка} не из доступных лет", row)
+            else:
+                отклонить(номер_строки, 'already_used', f"Плавка {плавка} уже есть в журнале", row)
+            continue
+        циклы = циклы_записи(row)
+        конфликты = [
+            конфликт for цикл in циклы
+            for индекс_циклов in (циклы_хранилища, циклы_в_файле)
+            for конфликт in индекс_циклов.пересечения(*цикл)
+        ]
+        if конфликты:
+            отклонить(номер_строки, 'overlap', "Печь уже занята в это время: " + описать_цикл(конфликты[0]), row)
+            continue
+
+        плавки_в_файле.add(плавка)
+        циклы_в_файле.добавить(циклы)
+        принятые.append((номер_строки, row, циклы))
+
+    if принятые and not dry_run and not (strict and отклонено):
+        # Файл проверялся без блокировки, чтобы большая загрузка не держала
+        # журнал. Под блокировкой перепроверяются только принятые строки:
+        # другая станция могла за это время записать те же плавки или циклы
+        with хранилище.lock():
+            индекс = хранилище.heat_index()
+            циклы_хранилища = хранилище.cycle_index()
+            к_записи = []
+            for номер_строки, row, циклы in принятые:
+                конфликты = [конфликт for цикл in циклы for конфликт in циклы_хранилища.пересечения(*цикл)]
+                if row[0] not in индекс:
+                    отклонить(номер_строки, 'already_used', f"Плавка {row[0]} уже есть в журнале", row)
+                elif конфликты:
+                    отклонить(номер_строки, 'overlap', "Печь уже занята в это время: " + описать_цикл(конфликты[0]), row)
+                else:
+                    к_записи.append(tuple(row))
+            if к_записи and not (strict and отклонено):
+                хранилище.append(к_записи)
+        принятые = к_записи
+
+    поля_замера().update(rows=len(принятые), rejected=отклонено)
+    return len(принятые), отклонено
+
+
+МИНУТ_В_СУТКАХ = 24 * 60
+# Номер дня для неверной даты: дни до 1970 года отрицательны, -1 - это 31.12.1969
+НЕТ_ДНЯ = -(1 << 31)
+ЗАГОЛОВКИ_ОТЧЕТА = ['Период', 'Номер печи', 'Начало периода', 'Циклов',
+                    'В работе, мин', 'Средний цикл, мин', 'Простой, мин',
+                    'Перерывов', 'Средний перерыв, мин', 'Макс. перерыв, мин',
+                    'Загрузка, %']
+
+
+def _numpy():
+    # numpy нужен только для отчета, форма и запись журнала без него работают
+    try:
+        import numpy
+    except ImportError:
+        raise Exception("Для отчета по журналу нужен numpy: pip install numpy")
+    return numpy
+
+
+class _ПоляЗаписей:
+    """Поля записей для разбора numpy без цикла по записям.
+
+    Записи склеиваются в одну строку и кодируются в C (map, join, encode),
+    numpy находит границы полей по разделителям, и ни одна запись не
+    проходит через код Python. Если в записях не только строки или
+    разделитель встретился в самом поле, записи переводятся в двумерный
+    массив строк.
+    """
+    ПОЛЕ, ЗАПИСЬ = '\x1f', '\x1e'
+    # Нули в хвосте буфера: окно шаблона у последнего поля не выходит за край
+    ЗАПАС = 16
+
+    def __init__(self, np, записи, столбцов):
+        self.np = np
+        self.записи = записи
+        self.буфер = None
+        try:
+            текст = self.ЗАПИСЬ.join(map(self.ПОЛЕ.join, записи)) if записи else None
+        except TypeError:
+            текст = None
+        if текст is not None:
+            буфер = np.frombuffer(текст.encode('utf-8', 'surrogatepass') + bytes(self.ЗАПАС), dtype=np.uint8)
+            # Оба разделителя - управляющие символы ниже пробела; другой такой
+            # символ в поле не сойдется с ожидаемым порядком разделителей
+            разделители = np.flatnonzero(буфер[:-self.ЗАПАС] <= ord(self.ПОЛЕ))
+            ожидается = np.tile(np.frombuffer((self.ПОЛЕ * (столбцов - 1) + self.ЗАПИСЬ).encode(), dtype=np.uint8),
+                                len(записи))[:-1]
+            if len(разделители) == len(ожидается) and np.array_equal(буфер[разделители], ожидается):
+                self.буфер = буфер
+                self.начала = np.concatenate(([0], разделители + 1)).reshape(-1, столбцов)
+                концы = np.append(разделители, len(буфер) - self.ЗАПАС).reshape(-1, столбцов)
+                self.длины = концы - self.начала
+                return
+        # Ширины хватает на дату и лишний символ за ней
+        if записи:
+            self.таблица = np.array(записи, dtype='U11')
+        else:
+            self.таблица = np.empty((0, столбцов), dtype='U11')
+
+    def коды(self, столбец, ширина):
+        """Коды первых символов поля (записей, ширина) и маска полей этой длины."""
+        np = self.np
+        if self.буфер is not None:
+            окна = np.lib.stride_tricks.sliding_window_view(self.буфер, ширина)
+            return окна[self.начала[:, столбец]], self.длины[:, столбец] == ширина
+        коды = self.таблица[:, столбец, None].view(np.uint32)
+        # Лишний символ в ширине ловит строки длиннее шаблона
+        return коды[:, :ширина], коды[:, ширина] == 0
+
+    def непустые(self, столбец):
+        if self.буфер is not None:
+            return self.длины[:, столбец] > 0
+        return self.таблица[:, столбец] != ''
+
+    def значение(self, номер, столбец):
+        return str(self.записи[номер][столбец])
+
+
+def _разобрать_шаблон(np, поля, столбец, шаблон):
+    """Разбирает столбец вида шаблона ('00.00.0000', '00:00') без цикла по записям.
+
+    Возвращает матрицу цифр (n, len(шаблон)) и маску записей, совпавших с шаблоном.
+    """
+    коды, верно = поля.коды(столбец, len(шаблон))
+    # Вычитание без знака: у не цифр разность переполняется и больше 9
+    цифры = коды - коды.dtype.type(ord('0'))
+    for позиция, символ in enumerate(шаблон):
+        if символ == '0':
+            верно &= цифры[:, позиция] <= 9
+        else:
+            верно &= коды[:, позиция] == ord(символ)
+    return цифры.astype(np.int64), верно
+
+
+def _минуты(np, поля, столбец):
+    """ЧЧ:ММ -> минуты от полуночи; -1, если время не задано или неверно."""
+    цифры, верно = _разобрать_шаблон(np, поля, столбец, '00:00')
+    часы = цифры[:, 0] * 10 + цифры[:, 1]
+    минуты = цифры[:, 3] * 10 + цифры[:, 4]
+    верно &= (часы < 24) & (минуты < 60)
+    результат = np.where(верно, часы * 60 + минуты, -1)
+    # Редкие записи не по шаблону (например 8:00) разбираются поштучно
+    for i in np.flatnonzero(~верно & поля.непустые(столбец)):
+        значение = поля.значение(i, столбец)
+        if значение and validate_time(значение):
+            часы, минуты = map(int, значение.split(':'))
+            результат[i] = часы * 60 + минуты
+    return результат
+
+
+def _дни(np, поля, столбец):
+    """ДД.ММ.ГГГГ -> номер дня от 1970-01-01; НЕТ_ДНЯ для неверной даты."""
+    цифры, верно = _разобрать_шаблон(np, поля, столбец, '00.00.0000')
+    день = цифры[:, 0] * 10 + цифры[:, 1]
+    месяц = цифры[:, 3] * 10 + цифры[:, 4]
+    год = цифры[:, 6] * 1000 + цифры[:, 7] * 100 + цифры[:, 8] * 10 + цифры[:, 9]
+    верно &= (месяц >= 1) & (месяц <= 12) & (день >= 1)
+    месяцы = np.where(верно, (год - 1970) * 12 + месяц - 1, 0)
+    начало_месяца = месяцы.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    дней_в_месяце = (месяцы + 1).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64) - начало_месяца
+    верно &= день <= дней_в_месяце
+    return np.where(верно, начало_месяца + день - 1, НЕТ_ДНЯ)
+
+
+def journal_arrays(records):
+    """Столбцы журнала по загрузкам в виде массивов: печь, день (от
+    1970-01-01) и четыре времени в минутах от полуночи; -1 (для дня
+    НЕТ_ДНЯ) там, где значение не задано или неверно.
+
+    Плавки одной загрузки идут подряд и отличаются только номером, поэтому
+    соседние записи с одинаковыми печью, датой и временами дают одну строку.
+    """
+    np = _numpy()
+    # Номер плавки отбрасывается, соседние повторы сводятся еще до numpy;
+    # map, itemgetter и groupby работают в C, без кода Python на запись
+    столбцы = operator.itemgetter(slice(1, len(ЗАГОЛОВКИ)))
+    загрузки = list(map(operator.itemgetter(0), itertools.groupby(map(столбцы, records))))
+    поля = _ПоляЗаписей(np, загрузки, len(ЗАГОЛОВКИ) - 1)
+
+    цифры, верно = _разобрать_шаблон(np, поля, 0, '0')
+    печь = np.where(верно, цифры[:, 0], -1)
+    for i in np.flatnonzero(~верно):
+        значение = поля.значение(i, 0)
+        if значение.isdigit():
+            печь[i] = int(значение)
+    return {
+        'печь': печь,
+        'день': _дни(np, поля, 1),
+        'время': [_минуты(np, поля, i) for i in range(2, len(ЗАГОЛОВКИ) - 1)],
+    }
+
+
+def journal_cycles(массивы):
+    """Уникальные циклы печей по массивам journal_arrays.
+
+    Несколько плавок одной загрузки дают одинаковые циклы, поэтому циклы
+    сводятся по (печь, начало, длительность). Конец раньше начала значит
+    переход через полночь; второй цикл начинается после конца первого.
+    Возвращает массивы печь, начало (минуты от 1970-01-01), длительность,
+    отсортированные по печи и началу.
+    """
+    np = _numpy()
+    печь, день = массивы['печь'], массивы['день']
+    начало1, конец1, начало2, конец2 = массивы['время']
+
+    есть1 = (печь >= 0) & (день != НЕТ_ДНЯ) & (начало1 >= 0) & (конец1 >= 0)
+    старт1 = день * МИНУТ_В_СУТКАХ + начало1
+    длительность1 = (конец1 - начало1) % МИНУТ_В_СУТКАХ
+    финиш1 = старт1 + длительность1
+
+    есть2 = есть1 & (начало2 >= 0) & (конец2 >= 0)
+    старт2 = финиш1 + (начало2 - конец1) % МИНУТ_В_СУТКАХ
+    длительность2 = (конец2 - начало2) % МИНУТ_В_СУТКАХ
+
+    печь = np.concatenate([печь[есть1], печь[есть2]])
+    старт = np.concatenate([старт1[есть1], старт2[есть2]])
+    длительность = np.concatenate([длительность1[есть1], длительность2[есть2]])
+
+    def без_повторов_подряд(*столбцы):
+        новый = np.zeros(len(столбцы[0]), dtype=bool)
+        новый[:1] = True
+        for столбец in столбцы:
+            новый[1:] |= столбец[1:] != столбец[:-1]
+        return [столбец[новый] for столбец in столбцы]
+
+    # Плавки одной загрузки идут подряд, поэтому сначала отбрасываются соседние
+    # повторы, затем остальное сортируется по печи и началу. Столбцы не
+    # упаковываются в одно число, чтобы не ограничивать диапазон дат
+    печь, старт, длительность = без_повторов_подряд(печь, старт, длительность)
+    порядок = np.lexsort((длительность, старт, печь))
+    return tuple(без_повторов_подряд(печь[порядок], старт[порядок], длительность[порядок]))
+
+
+@замеряется('report')
+def journal_report(records):
+    """Сводка по печам за сутки и недели (ЗАГОЛОВКИ_ОТЧЕТА)."""
+    return journal_summary(journal_arrays(records))
+
+
+def journal_summary(массивы):
+    """Сводка по массивам journal_arrays, без циклов по записям.
+
+    Минуты цикла, перешедшего через полночь, делятся между двумя сутками.
+    Перерыв - время от конца цикла до начала следующего на той же печи,
+    относится к периоду, в котором закончился предыдущий цикл. Загрузка -
+    доля минут периода, когда печь работала.
+    """
+    np = _numpy()
+    печь, старт, длительность = journal_cycles(массивы)
+    финиш = старт + длительность
+    день_старта = старт // МИНУТ_В_СУТКАХ
+    до_полуночи = np.minimum(финиш, (день_старта + 1) * МИНУТ_В_СУТКАХ) - старт
+    через_полночь = длительность > до_полуночи
+
+    та_же_печь = печь[1:] == печь[:-1]
+    перерыв = np.maximum(старт[1:] - финиш[:-1], 0)[та_же_печь]
+    печь_перерыва = печь[:-1][та_же_печь]
+    день_перерыва = (финиш[:-1] // МИНУТ_В_СУТКАХ)[та_же_печь]
+
+    строки = []
+    for период, дней in (('сутки', 1), ('неделя', 7)):
+        if дней == 1:
+            начало_периода = lambda день: день
+        else:
+            # Неделя с понедельника; 1970-01-01 - четверг
+            начало_периода = lambda день: день - (день + 3) % 7
+
+        # День сдвигается на 2**31, чтобы даты до 1970 года не задевали печь
+        def ключ(печи, дни):
+            return печи * (1 << 32) + (начало_периода(дни) + (1 << 31))
+
+        ключ_старта = ключ(печь, день_старта)
+        ключ_после_полуночи = ключ(печь[через_полночь], день_старта[через_полночь] + 1)
+        ключ_перерыва = ключ(печь_перерыва, день_перерыва)
+        # Каждая часть уже почти упорядочена (циклы идут по печи и началу):
+        # устойчивая сортировка сливает готовые серии, хэш np.unique не нужен
+        ключи = np.concatenate([ключ_старта, ключ_после_полуночи, ключ_перерыва])
+        ключи.sort(kind='stable')
+        новый = np.ones(len(ключи), dtype=bool)
+        новый[1:] = ключи[1:] != ключи[:-1]
+        группы = ключи[новый]
+        n = len(группы)
+        группа_старта = np.searchsorted(группы, ключ_старта)
+        группа_после_полуночи = np.searchsorted(группы, ключ_после_полуночи)
+        группа_перерыва = np.searchsorted(группы, ключ_перерыва)
+
+        def сумма(группа, веса=None):
+            return np.bincount(группа, weights=веса, minlength=n)
+
+        циклов = сумма(группа_старта)
+        длительность_циклов = сумма(группа_старта, длительность)
+        в_работе = сумма(группа_старта, до_полуночи) + сумма(группа_после_полуночи, (длительность - до_полуночи)[через_полночь])
+        перерывов = сумма(группа_перерыва)
+        сумма_перерывов = сумма(группа_перерыва, перерыв)
+        макс_перерыв = np.zeros(n)
+        np.maximum.at(макс_перерыв, группа_перерыва, перерыв)
+
+        минут_в_периоде = дней * МИНУТ_В_СУТКАХ
+        with np.errstate(invalid='ignore', divide='ignore'):
+            средний_цикл = np.where(циклов > 0, длительность_циклов / циклов, 0)
+            средний_перерыв = np.where(перерывов > 0, сумма_перерывов / перерывов, 0)
+        загрузка = в_работе / минут_в_периоде * 100
+        даты = (группы % (1 << 32) - (1 << 31)).astype('datetime64[D]').astype(str)
+
+        # Строк в сводке - число пар (печь, период), а не записей журнала
+        строки.extend(zip(
+            [период] * n, (группы >> 32).tolist(), даты.tolist(),
+            циклов.astype(np.int64).tolist(), в_работе.astype(np.int64).tolist(),
+            np.round(средний_цикл, 1).tolist(), (минут_в_периоде - в_работе).astype(np.int64).tolist(),
+            перерывов.astype(np.int64).tolist(), np.round(средний_перерыв, 1).tolist(),
+            макс_перерыв.astype(np.int64).tolist(), np.round(загрузка, 1).tolist()
+        ))
+    return строки
+
+
+def write_report(строки, file_name):
+    """Пишет сводку в CSV (разделитель ;) или в лист Сводка, если имя оканчивается на .xlsx."""
+    if file_name.lower().endswith('.xlsx'):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Сводка")
+        ws.append(ЗАГОЛОВКИ_ОТЧЕТА)
+        for строка in строки:
+            ws.append(list(строка))
+        _сохранить_книгу(wb, file_name)
+        return
+    with open(file_name, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(ЗАГОЛОВКИ_ОТЧЕТА)
+        writer.writerows(строки)
+
+
+ЗАГОЛОВКИ_ЗАМЕРОВ = ['Операция', 'Вызовов', 'p50, мс', 'p95, мс', 'Макс., мс', 'Строк (медиана)']
+
+
+def _перцентиль(отсортированные, доля):
+    """Перцентиль по ближайшему рангу."""
+    return отсортированные[max(0, -(-len(отсортированные) * доля // 100) - 1)]
+
+
+def log_summary(file_name=ФАЙЛ_ЛОГА, с_даты=None):
+    """p50/p95/максимум длительности по операциям журнала замеров (ЗАГОЛОВКИ_ЗАМЕРОВ).
+
+    с_даты - строка ISO (ГГГГ-ММ-ДД...), более ранние замеры пропускаются.
+    """
+    длительности = {}
+    строки = {}
+    with open(file_name, encoding='utf-8') as f:
+        for line in f:
+            try:
+                запись = json.loads(line)
+                операция, мс = запись['op'], float(запись['ms'])
+            except (ValueError, KeyError, TypeError):
+                continue
+            if с_даты and запись.get('ts', '') < с_даты:
+                continue
+            длительности.setdefault(операция, []).append(мс)
+            if isinstance(запись.get('rows'), int):
+                строки.setdefault(операция, []).append(запись['rows'])
+    сводка = []
+    for операция, значения in sorted(длительности.items()):
+        значения.sort()
+        строк = sorted(строки.get(операция, []))
+        сводка.append((
+            операция, len(значения), _перцентиль(значения, 50), _перцентиль(значения, 95),
+            значения[-1], _перцентиль(строк, 50) if строк else None
+        ))
+    return сводка
+
+
+@замеряется('heats')
+def get_heat_index(проверить=True):
+    индекс = get_storage().heat_index(проверить)
+    поля_замера()['rows'] = len(индекс)
+    return индекс
+
+
+def get_available_plavki(проверить=True):
+    return get_storage().available_plavki(проверить)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Электронный журнал термообработки")
+    commands = parser.add_subparsers(dest='command')
+
+    migrate = commands.add_parser('migrate', help='перенести termoobrabotka.xlsx и plavka.xlsx в SQLite')
+    migrate.add_argument('--db', default=ФАЙЛ_БАЗЫ)
+    migrate.add_argument('--journal', default=ФАЙЛ_ЖУРНАЛА)
+    migrate.add_argument('--plavki', default=ФАЙЛ_ПЛАВОК)
+
+    export = commands.add_parser('export', help='выгрузить журнал из SQLite в xlsx')
+    export.add_argument('--db', default=ФАЙЛ_БАЗЫ)
+    export.add_argument('--out', default=ФАЙЛ_ЖУРНАЛА)
+
+    import_csv = commands.add_parser('import', help='дописать в журнал загрузки печей из CSV')
+    import_csv.add_argument('csv', help='CSV со столбцами листа Records')
+    import_csv.add_argument('--report', help='куда писать отклоненные строки (JSON Lines), по умолчанию stdout')
+    import_csv.add_argument('--encoding', default='utf-8-sig')
+    import_csv.add_argument('--dry-run', action='store_true', help='только проверить, журнал не менять')
+    import_csv.add_argument('--strict', action='store_true', help='ничего не писать, если есть отклоненные строки')
+
+    report = commands.add_parser('report', help='загрузка печей и длительность циклов по суткам и неделям')
+    report.add_argument('--out', default='termo_report.csv', help='CSV или .xlsx')
+
+    archive = commands.add_parser('archive', help='перенести строки закрытых лет в termoobrabotka_<год>.xlsx')
+    archive.add_argument('--journal', default=ФАЙЛ_ЖУРНАЛА)
+    archive.add_argument('--year', type=int, help='активный год (по умолчанию TERMO_YEAR или текущий)')
+
+    stats = commands.add_parser('stats', help='p50/p95 длительности операций по журналу замеров')
+    stats.add_argument('--log', default=os.environ.get('TERMO_LOG') or ФАЙЛ_ЛОГА)
+    stats.add_argument('--since', help='только замеры с этой даты (ГГГГ-ММ-ДД)')
+    stats.add_argument('--profile', help='каталог TERMO_PROFILE: сводка профилей cProfile')
+    stats.add_argument('--top', type=int, default=25, help='сколько функций профиля показать')
+
+    args = parser.parse_args(argv)
+    if args.command == 'stats':
+        print(f"{ЗАГОЛОВКИ_ЗАМЕРОВ[0]:<18} {ЗАГОЛОВКИ_ЗАМЕРОВ[1]:>8} {ЗАГОЛОВКИ_ЗАМЕРОВ[2]:>10} "
+              f"{ЗАГОЛОВКИ_ЗАМЕРОВ[3]:>10} {ЗАГОЛОВКИ_ЗАМЕРОВ[4]:>10} {ЗАГОЛОВКИ_ЗАМЕРОВ[5]:>16}")
+        for операция, вызовов, p50, p95, макс, строк in log_summary(args.log, args.since):
+            print(f"{операция:<18} {вызовов:>8} {p50:>10.1f} {p95:>10.1f} {макс:>10.1f} "
+                  f"{'' if строк is None else строк:>16}")
+        if args.profile:
+            import pstats
+            профили = sorted(glob.glob(os.path.join(args.profile, '*.prof')))
+            if профили:
+                pstats.Stats(*профили).sort_stats('cumulative').print_stats(args.top)
+        return 0
+    if args.command == 'report':
+        write_report(journal_report(get_storage().all_records()), args.out)
+        return 0
+    if args.command == 'import':
+        отчет = open(args.report, 'w', encoding='utf-8') if args.report else sys.stdout
         try:
-            # Сохраняем данные для каждой выбранной плавки
-            for плавка in выбранные_плавки:
-                save_to_excel(
-                    плавка,
-                    номер_печи,
-                    термообработка_дата,
-                    начало_первого_цикла,
-                    конец_первого_цикла,
-                    начало_второго_цикла,
-                    конец_второго_цикла
-                )
-
-            QMessageBox.information(self, "Успех", "Данные сохранены в Excel!")
-            self.clear_fields()
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка при сохранении данных: {str(e)}")
-
-    def clear_fields(self):
-        self.термообработка_дата.setDate(QDate.currentDate())
-        self.термообработка_начало_первого_цикла.clear()
-        self.термообработка_конец_первого_цикла.clear()
-        self.термообработка_начало_второго_цикла.clear()
-        self.термообработка_конец_второго_цикла.clear()
-        self.update_plavka_fields(self.термообработка_номер_печи.currentText())
+            принято, отклонено = import_records_from_csv(
+                args.csv, отчет, args.encoding, args.dry_run, args.strict
+            )
+        finally:
+            if отчет is not sys.stdout:
+                отчет.close()
+        записано = 0 if args.dry_run or (args.strict and отклонено) else принято
+        print(f"Принято: {принято}, отклонено: {отклонено}, записано: {записано}", file=sys.stderr)
+        return 1 if отклонено else 0
+    if args.command == 'migrate':
+        хранилище = SQLiteStorage(args.db, args.plavki, args.journal)
+        количество = хранилище.import_from_excel()
+        print(f"Перенесено записей: {количество}")
+        return 0
+    if args.command == 'export':
+        SQLiteStorage(args.db).export_to_excel(args.out)
+        return 0
+    if args.command == 'archive':
+        with блокировка_файла(args.journal):
+            перенесено = archive_closed_years(args.journal, args.year)
+        for год, количество in sorted(перенесено.items()):
+            print(f"{файл_архива(args.journal, год)}: {количество}")
+        if not перенесено:
+            print("Строк закрытых лет в журнале нет")
+        return 0
+
+    import termoobrabotka_gui
+    return termoobrabotka_gui.run()
+
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MainWindow()
-    window.show()
-    sys.exit(app.exec())
+    sys.exit(main())
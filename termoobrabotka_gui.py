@@ -0,0 +1,587 @@
+"""Форма электронного журнала термообработки.
+
+Qt импортируется только здесь; работа с журналом - в termoobrabotka.
+"""
+import sys
+import time
+from PySide6.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QLineEdit,
+    QPushButton, QMessageBox, QLabel, QComboBox, QDateEdit, QHBoxLayout,
+    QProgressBar, QCompleter
+)
+from PySide6.QtCore import (
+    Qt, QDate, QObject, QRunnable, QThreadPool, QTimer, Signal,
+    QStringListModel, QSortFilterProxyModel, QRegularExpression
+)
+from PySide6.QtGui import QPalette, QColor, QFont
+
+from termoobrabotka import (
+    HeatIndex, МАКС_ПОЛЕЙ_ПЛАВОК, МАКС_ПОДСКАЗОК,
+    get_heat_index, save_records, validate_cycles, validate_time,
+    замер, записать_замер
+)
+
+
+class WorkerSignals(QObject):
+    finished = Signal(object)
+    error = Signal(str)
+
+
+class Worker(QRunnable):
+    """Выполняет функцию в пуле потоков и возвращает результат сигналом."""
+
+    def __init__(self, функция, *args):
+        super().__init__()
+        self.функция = функция
+        self.args = args
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            результат = self.функция(*self.args)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(результат)
+
+
+class HeatFilterProxy(QSortFilterProxyModel):
+    """Плавки для одного поля без тех, что уже выбраны в других полях.
+
+    Все поля смотрят в одну QStringListModel. Ее строка 0 пустая и
+    показывается как "ПЛАВКА N": выбор этой строки означает пустое поле.
+    Фильтр - регулярное выражение, чтобы строки перебирал Qt, а не Python.
+    """
+
+    def __init__(self, номер_поля, parent=None):
+        super().__init__(parent)
+        self.надпись = f"ПЛАВКА {номер_поля + 1}"
+        self.занятые = set()
+
+    def data(self, index, role=Qt.DisplayRole):
+        # Пустая строка фильтром не отсекается и без сортировки всегда первая
+        if role == Qt.DisplayRole and index.row() == 0:
+            return self.надпись
+        return super().data(index, role)
+
+    def set_busy_heats(self, занятые):
+        if занятые == self.занятые:
+            return
+        self.занятые = занятые
+        if занятые:
+            варианты = '|'.join(QRegularExpression.escape(плавка) for плавка in sorted(занятые))
+            self.setFilterRegularExpression(f"^(?!(?:{варианты})$)")
+        else:
+            self.setFilterRegularExpression("")
+
+
+class MainWindow(QWidget):
+    plavki_loaded = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self._первая_отрисовка = False
+        self.plавка_fields = []
+        self.индекс_плавок = HeatIndex()
+        self.количество_полей = МАКС_ПОЛЕЙ_ПЛАВОК
+        # Одна модель на все поля плавок, у каждого поля свой фильтр
+        self.модель_плавок = QStringListModel([''], self)
+        self._обновление_фильтров = False
+        # Один поток: чтения и записи журнала выполняются строго по очереди
+        self.пул = QThreadPool(self)
+        self.пул.setMaxThreadCount(1)
+        # Ссылки на задачи держим до ответа: без них PySide удалит
+        # обертку QRunnable, пока она еще выполняется в пуле
+        self.задачи = set()
+        
+        self.setWindowTitle("Электронный журнал термообработки")
+        self.setMinimumWidth(600)  # Уменьшаем минимальную ширину
+        self.setMinimumHeight(400)  # Уменьшаем минимальную высоту
+        
+        # Обновляем стили для более компактного вида
+        self.setStyleSheet("""
+            QWidget {
+                background-color: #1a1a1a;
+                color: #ffffff;
+                font-family: 'Arial';
+            }
+            QLabel {
+                color: #00ffff;
+                font-size: 12px;  /* Уменьшаем размер шрифта */
+                padding: 5px;     /* Уменьшаем отступы */
+                border: 1px solid #00ffff;
+                border-radius: 3px;
+                background-color: #2a2a2a;
+                margin: 1px;      /* Добавляем минимальные внешние отступы */
+            }
+            QComboBox {
+                background-color: #2a2a2a;
+                border: 1px solid #00ffff;
+                border-radius: 3px;
+                padding: 3px;
+                color: #ffffff;
+                min-height: 20px; /* Уменьшаем минимальную высоту */
+                margin: 1px;
+            }
+            QComboBox::drop-down {
+                border: none;
+                width: 20px;
+            }
+            QComboBox QLineEdit {
+                border: none;
+                padding: 0px;
+                margin: 0px;
+            }
+            QLineEdit {
+                background-color: #2a2a2a;
+                border: 1px solid #00ffff;
+                border-radius: 3px;
+                padding: 3px;
+                color: #ffffff;
+                min-height: 20px;
+                margin: 1px;
+            }
+            QDateEdit {
+                background-color: #2a2a2a;
+                border: 1px solid #00ffff;
+                border-radius: 3px;
+                padding: 3px;
+                color: #ffffff;
+                min-height: 20px;
+                margin: 1px;
+            }
+            QPushButton {
+                background-color: #00ffff;
+                color: #000000;
+                border: none;
+                border-radius: 3px;
+                padding: 5px;
+                font-size: 12px;
+                font-weight: bold;
+                min-height: 25px;
+                margin: 1px;
+            }
+            QPushButton:hover {
+                background-color: #00cccc;
+            }
+            QPushButton:disabled {
+                background-color: #2a2a2a;
+                color: #555555;
+            }
+            QProgressBar {
+                background-color: #2a2a2a;
+                border: 1px solid #00ffff;
+                border-radius: 3px;
+                color: #00ffff;
+                max-height: 6px;
+                margin: 1px;
+            }
+            QProgressBar::chunk {
+                background-color: #00ffff;
+            }
+        """)
+
+        layout = QVBoxLayout()
+        layout.setSpacing(2)  # Уменьшаем расстояние между элементами
+        layout.setContentsMargins(5, 5, 5, 5)  # Уменьшаем отступы от краёв
+
+        # Заголовок
+        title = QLabel("ЭЛЕКТРОННЫЙ ЖУРНАЛ ТЕРМООБРАБОТКИ")
+        title.setStyleSheet("""
+            QLabel {
+                font-size: 16px;
+                font-weight: bold;
+                color: #00ffff;
+                border: 2px solid #00ffff;
+                padding: 5px;
+                background-color: #2a2a2a;
+            }
+        """)
+        title.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title)
+
+        # Создаем горизонтальные контейнеры для группировки элементов
+        top_container = QWidget()
+        top_layout = QHBoxLayout(top_container)
+        top_layout.setSpacing(2)
+        top_layout.setContentsMargins(0, 0, 0, 0)
+
+        # Левая часть с печью и плавками
+        left_container = QWidget()
+        left_layout = QVBoxLayout(left_container)
+        left_layout.setSpacing(2)
+        left_layout.setContentsMargins(0, 0, 0, 0)
+
+        печь_label = QLabel("НОМЕР ПЕЧИ")
+        печь_label.setAlignment(Qt.AlignCenter)
+        left_layout.addWidget(печь_label)
+
+        self.термообработка_номер_печи = QComboBox()
+        self.термообработка_номер_печи.addItems(['1', '2'])
+        self.термообработка_номер_печи.currentTextChanged.connect(self.on_furnace_changed)
+        left_layout.addWidget(self.термообработка_номер_печи)
+
+        # Контейнер для плавок
+        self.plавка_container = QWidget()
+        self.plавка_layout = QVBoxLayout(self.plавка_container)
+        self.plавка_layout.setSpacing(2)
+        self.plавка_layout.setContentsMargins(0, 0, 0, 0)
+        left_layout.addWidget(self.plавка_container)
+
+        # Поля создаются один раз; при смене печи лишние только скрываются
+        for i in range(МАКС_ПОЛЕЙ_ПЛАВОК):
+            proxy = HeatFilterProxy(i, self)
+            proxy.setSourceModel(self.модель_плавок)
+            combo = QComboBox()
+            combo.setModel(proxy)
+            # Ширина по длине номера, а не по всем строкам списка
+            combo.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLengthWithIcon)
+            combo.setMinimumContentsLength(12)
+            # Номер можно набрать: подсказки берутся из индекса по префиксу
+            combo.setEditable(True)
+            combo.setInsertPolicy(QComboBox.NoInsert)
+            combo.lineEdit().setPlaceholderText(proxy.надпись)
+            completer = QCompleter(QStringListModel(combo), combo)
+            completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+            combo.setCompleter(completer)
+            combo.lineEdit().textEdited.connect(
+                lambda text, combo=combo: self.on_plavka_typed(combo, text)
+            )
+            completer.activated[str].connect(
+                lambda _, combo=combo: self.on_plavka_entered(combo)
+            )
+            combo.lineEdit().editingFinished.connect(
+                lambda combo=combo: self.on_plavka_entered(combo)
+            )
+            combo.currentIndexChanged.connect(self.on_plavka_selected)
+            self.plавка_fields.append(combo)
+            self.plавка_layout.addWidget(combo)
+
+        top_layout.addWidget(left_container)
+
+        # Правая часть с датой и циклами
+        right_container = QWidget()
+        right_layout = QVBoxLayout(right_container)
+        right_layout.setSpacing(2)
+        right_layout.setContentsMargins(0, 0, 0, 0)
+
+        дата_label = QLabel("ТЕРМООБРАБОТКА")
+        дата_label.setAlignment(Qt.AlignCenter)
+        дата_label.setStyleSheet("""
+            QLabel {
+                color: #000000;
+                font-size: 32px;
+                font-weight: bold;
+                padding: 5px;
+                border: 1px solid #00ffff;
+                border-radius: 3px;
+                background-color: #2a2a2a;
+                margin: 1px;
+                background-image: url(termo.png);
+                background-position: center;
+                background-repeat: no-repeat;
+                background-origin: content;
+            }
+        """)
+        right_layout.addWidget(дата_label)
+
+        self.термообработка_дата = QDateEdit()
+        self.термообработка_дата.setDisplayFormat("dd.MM.yyyy")
+        self.термообработка_дата.setCalendarPopup(True)
+        self.термообработка_дата.setDate(QDate.currentDate())
+        right_layout.addWidget(self.термообработка_дата)
+
+        # Контейнер для циклов
+        cycles_container = QWidget()
+        cycles_layout = QHBoxLayout(cycles_container)
+        cycles_layout.setSpacing(2)
+        cycles_layout.setContentsMargins(0, 0, 0, 0)
+
+        # Первый цикл
+        cycle1_container = QWidget()
+        cycle1_layout = QVBoxLayout(cycle1_container)
+        cycle1_layout.setSpacing(2)
+        cycle1_layout.setContentsMargins(0, 0, 0, 0)
+
+        цикл1_label = QLabel("ПЕРВЫЙ ЦИКЛ")
+        цикл1_label.setAlignment(Qt.AlignCenter)
+        cycle1_layout.addWidget(цикл1_label)
+
+        self.термообработка_начало_первого_цикла = QLineEdit()
+        self.термообработка_начало_первого_цикла.setPlaceholderText("Начало (ЧЧ:ММ)")
+        self.термообработка_начало_первого_цикла.setMaxLength(5)
+        self.термообработка_начало_первого_цикла.textChanged.connect(self.format_time_input)
+        cycle1_layout.addWidget(self.термообработка_начало_первого_цикла)
+
+        self.термообработка_конец_первого_цикла = QLineEdit()
+        self.термообработка_конец_первого_цикла.setPlaceholderText("Конец (ЧЧ:ММ)")
+        self.термообработка_конец_первого_цикла.setMaxLength(5)
+        self.термообработка_конец_первого_цикла.textChanged.connect(self.format_time_input)
+        cycle1_layout.addWidget(self.термообработка_конец_первого_цикла)
+
+        cycles_layout.addWidget(cycle1_container)
+
+        # Второй цикл
+        cycle2_container = QWidget()
+        cycle2_layout = QVBoxLayout(cycle2_container)
+        cycle2_layout.setSpacing(2)
+        cycle2_layout.setContentsMargins(0, 0, 0, 0)
+
+        цикл2_label = QLabel("ВТОРОЙ ЦИКЛ")
+        цикл2_label.setAlignment(Qt.AlignCenter)
+        cycle2_layout.addWidget(цикл2_label)
+
+        self.термообработка_начало_второго_цикла = QLineEdit()
+        self.термообработка_начало_второго_цикла.setPlaceholderText("Начало (ЧЧ:ММ)")
+        self.термообработка_начало_второго_цикла.setMaxLength(5)
+        self.термообработка_начало_второго_цикла.textChanged.connect(self.format_time_input)
+        cycle2_layout.addWidget(self.термообработка_начало_второго_цикла)
+
+        self.термообработка_конец_второго_цикла = QLineEdit()
+        self.термообработка_конец_второго_цикла.setPlaceholderText("Конец (ЧЧ:ММ)")
+        self.термообработка_конец_второго_цикла.setMaxLength(5)
+        self.термообработка_конец_второго_цикла.textChanged.connect(self.format_time_input)
+        cycle2_layout.addWidget(self.термообработка_конец_второго_цикла)
+
+        cycles_layout.addWidget(cycle2_container)
+        right_layout.addWidget(cycles_container)
+
+        top_layout.addWidget(right_container)
+        layout.addWidget(top_container)
+
+        # Кнопка сохранения
+        self.save_button = QPushButton("СОХРАНИТЬ")
+        self.save_button.clicked.connect(self.save_data)
+        layout.addWidget(self.save_button)
+
+        # Индикатор фоновой работы с журналом
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 0)
+        self.progress.setTextVisible(False)
+        self.progress.hide()
+        layout.addWidget(self.progress)
+
+        self.setLayout(layout)
+        
+        # Плавки загружаются после первой отрисовки окна (см. paintEvent)
+        self.set_loading(True)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._первая_отрисовка:
+            self._первая_отрисовка = True
+            QTimer.singleShot(0, lambda: self.update_plavka_fields(
+                self.термообработка_номер_печи.currentText()
+            ))
+
+    def set_loading(self, загрузка):
+        # Пока каталог плавок не загружен, поля плавок недоступны
+        for combo in self.plавка_fields:
+            combo.setEnabled(not загрузка)
+            combo.lineEdit().setPlaceholderText(
+                "Загрузка плавок…" if загрузка else combo.model().надпись
+            )
+
+    def run_in_background(self, функция, *args, finished=None, error=None):
+        worker = Worker(функция, *args)
+        worker.setAutoDelete(False)
+        self.задачи.add(worker)
+        worker.signals.finished.connect(lambda _, w=worker: self.задачи.discard(w))
+        worker.signals.error.connect(lambda _, w=worker: self.задачи.discard(w))
+        if finished is not None:
+            worker.signals.finished.connect(finished)
+        if error is not None:
+            worker.signals.error.connect(error)
+        self.пул.start(worker)
+
+    def set_busy(self, занят):
+        self.progress.setVisible(занят)
+
+    def on_furnace_changed(self, печь_номер):
+        # Каталог уже загружен - при смене печи файлы не перечитываем
+        self.build_plavka_fields(печь_номер)
+
+    def update_plavka_fields(self, печь_номер):
+        # Доступные плавки загружаются в фоне, поля строятся по результату
+        self.set_busy(True)
+        self._начало_загрузки = time.perf_counter()
+        self.run_in_background(
+            get_heat_index,
+            finished=self.on_plavki_loaded,
+            error=self.on_plavki_error
+        )
+
+    def on_plavki_loaded(self, индекс):
+        self.индекс_плавок = индекс
+        self.set_loading(False)
+        self.set_busy(not self.save_button.isEnabled())
+        with замер('ui.refresh', rows=len(индекс)):
+            self._обновление_фильтров = True
+            for combo in self.plавка_fields:
+                combo.model().set_busy_heats(set())
+            # Сброс модели сбрасывает и выбор во всех полях
+            self.модель_плавок.setStringList([''] + индекс.по_убыванию)
+            for combo in self.plавка_fields:
+                combo.setCurrentIndex(0)
+            self._обновление_фильтров = False
+            self.build_plavka_fields(self.термообработка_номер_печи.currentText())
+        # От запроса до готовых полей, вместе с ожиданием в очереди пула
+        записать_замер('ui.heats_ready', (time.perf_counter() - self._начало_загрузки) * 1000,
+                       rows=len(индекс))
+        self.plavki_loaded.emit()
+
+    def on_plavki_error(self, сообщение):
+        self.set_loading(False)
+        self.set_busy(not self.save_button.isEnabled())
+        QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке плавок: {сообщение}")
+
+    def build_plavka_fields(self, печь_номер):
+        # Определяем количество полей в зависимости от номера печи
+        self.количество_полей = 10 if печь_номер == '1' else 9
+
+        for i, combo in enumerate(self.plавка_fields):
+            видимо = i < self.количество_полей
+            if not видимо:
+                combo.setCurrentIndex(0)
+            if combo.isVisibleTo(self.plавка_container) != видимо:
+                combo.setVisible(видимо)
+
+    def selected_plavki(self):
+        """Плавки, выбранные или набранные в видимых полях, по порядку полей."""
+        выбранные_плавки = []
+        for combo in self.plавка_fields[:self.количество_полей]:
+            плавка = combo.currentText().strip()
+            if плавка:
+                выбранные_плавки.append(плавка)
+        return выбранные_плавки
+
+    def on_plavka_typed(self, combo, text):
+        # Подсказки по префиксу без плавок, выбранных в других полях
+        найдено = self.индекс_плавок.найти(
+            text.strip(), лимит=МАКС_ПОДСКАЗОК, исключить=combo.model().занятые
+        ) if text.strip() else []
+        completer = combo.completer()
+        completer.model().setStringList(найдено)
+        if найдено:
+            completer.complete()
+
+    def on_plavka_entered(self, combo):
+        # Набранный номер становится выбором поля, если он есть в списке
+        плавка = combo.currentText().strip()
+        if not плавка:
+            combo.setCurrentIndex(0)
+            return
+        if плавка in self.индекс_плавок:
+            индекс = combo.findText(плавка, Qt.MatchFixedString | Qt.MatchCaseSensitive)
+            if индекс >= 0:
+                combo.setCurrentIndex(индекс)
+
+    def on_plavka_selected(self, _):
+        # Выбранная плавка пропадает из списков остальных полей
+        if self._обновление_фильтров:
+            return
+        self._обновление_фильтров = True
+        try:
+            выбранные = [combo.currentData(Qt.EditRole) for combo in self.plавка_fields]
+            for i, combo in enumerate(self.plавка_fields):
+                combo.model().set_busy_heats(
+                    {плавка for j, плавка in enumerate(выбранные) if плавка and j != i}
+                )
+        finally:
+            self._обновление_фильтров = False
+
+    def format_time_input(self, text):
+        """Автоматически добавляет двоеточие после двух цифр"""
+        if len(text) == 2 and text.isdigit():
+            self.sender().setText(text + ":")
+            self.sender().setCursorPosition(3)  # Установка курсора после двоеточия
+
+    def validate_time(self, time_str):
+        return validate_time(time_str)
+
+    def save_data(self):
+        номер_печи = self.термообработка_номер_печи.currentText()
+        термообработка_дата = self.термообработка_дата.date().toString("dd.MM.yyyy")
+        начало_первого_цикла = self.термообработка_начало_первого_цикла.text().strip()
+        конец_первого_цикла = self.термообработка_конец_первого_цикла.text().strip()
+        начало_второго_цикла = self.термообработка_начало_второго_цикла.text().strip()
+        конец_второго_цикла = self.термообработка_конец_второго_цикла.text().strip()
+
+        ошибка = validate_cycles(начало_первого_цикла, конец_первого_цикла,
+                                 начало_второго_цикла, конец_второго_цикла)
+        if ошибка:
+            QMessageBox.warning(self, "Ошибка", ошибка)
+            return
+
+        # Собираем выбранные плавки
+        выбранные_плавки = self.selected_plavki()
+
+        if not выбранные_плавки:
+            QMessageBox.warning(self, "Ошибка", "Выберите хотя бы одну плавку.")
+            return
+
+        недоступные = [плавка for плавка in выбранные_плавки if плавка not in self.индекс_плавок]
+        if недоступные:
+            QMessageBox.warning(self, "Ошибка", f"Плавки нет в списке доступных: {', '.join(недоступные)}")
+            return
+
+        if len(set(выбранные_плавки)) != len(выбранные_плавки):
+            QMessageBox.warning(self, "Ошибка", "Одна и та же плавка выбрана несколько раз.")
+            return
+
+        # Сохраняем все выбранные плавки одной записью в книгу, в фоне.
+        # Кнопка заблокирована до ответа, чтобы не было повторного нажатия.
+        self.save_button.setEnabled(False)
+        self.set_busy(True)
+        self._начало_сохранения = time.perf_counter()
+        self.run_in_background(
+            save_records,
+            [
+                (
+                    плавка,
+                    номер_печи,
+                    термообработка_дата,
+                    начало_первого_цикла,
+                    конец_первого_цикла,
+                    начало_второго_цикла,
+                    конец_второго_цикла
+                )
+                for плавка in выбранные_плавки
+            ],
+            finished=self.on_saved,
+            error=self.on_save_error
+        )
+
+    def on_saved(self, _):
+        записать_замер('ui.save', (time.perf_counter() - self._начало_сохранения) * 1000)
+        self.save_button.setEnabled(True)
+        self.set_busy(False)
+        QMessageBox.information(self, "Успех", "Данные сохранены в Excel!")
+        self.clear_fields()
+
+    def on_save_error(self, сообщение):
+        записать_замер('ui.save', (time.perf_counter() - self._начало_сохранения) * 1000,
+                       error=сообщение)
+        self.save_button.setEnabled(True)
+        self.set_busy(False)
+        QMessageBox.critical(self, "Ошибка", f"Ошибка при сохранении данных: {сообщение}")
+
+    def clear_fields(self):
+        self.термообработка_дата.setDate(QDate.currentDate())
+        self.термообработка_начало_первого_цикла.clear()
+        self.термообработка_конец_первого_цикла.clear()
+        self.термообработка_начало_второго_цикла.clear()
+        self.термообработка_конец_второго_цикла.clear()
+        self.update_plavka_fields(self.термообработка_номер_печи.currentText())
+
+    def closeEvent(self, event):
+        # Не обрываем запись журнала на середине
+        self.пул.waitForDone()
+        super().closeEvent(event)
+
+
+def run():
+    app = QApplication(sys.argv[:1])
+    window = MainWindow()
+    window.show()
+    return app.exec()